@@ -0,0 +1,179 @@
+import os
+import re
+
+from datetime import datetime
+from pathlib import Path
+
+from format_containerexcel import extract_size_from_iso
+from plan_export import CONSTANT_COLUMNS, plan_rows
+from stowage_engine import generate_order
+
+# BAPLIE (SMDG, UN/EDIFACT D.95B): satu grup segmen per kontainer, diawali LOC+147 (posisi stowage
+# ISO 9711: bay 3 digit + row 2 digit + tier 2 digit, label sama seperti export_plan_to_excel).
+BAPLIE_MESSAGE_TYPE = ("BAPLIE", "D", "95B", "UN", "SMDG20")
+DEFAULT_SEPARATORS = {"component": ":", "element": "+", "release": "?", "segment": "'"}
+WEIGHT_UNITS_KG = {"KGM": 1.0, "KG": 1.0, "TNE": 1000.0, "LBR": 0.45359237}
+
+# MARK: Writer
+def _escape(value, sep=DEFAULT_SEPARATORS):
+    return re.sub("[" + re.escape("".join(sep.values())) + "]", lambda m: sep["release"] + m.group(0), str(value))
+
+def _segment(tag, *elements):
+    """Satu segmen EDIFACT; elemen berupa str atau tuple komponen. Elemen/komponen kosong di akhir dibuang."""
+    elements = [tuple(map(str, e)) if isinstance(e, tuple) else (str(e),) for e in elements]
+    elements = [e[:max((i + 1 for i, c in enumerate(e) if c), default=0)] for e in elements]
+    while elements and not elements[-1]: elements.pop()
+    return "+".join([tag] + [":".join(_escape(c) for c in e) for e in elements]) + DEFAULT_SEPARATORS["segment"]
+
+def baplie_segments(rows, vessel="", voyage="", carrier="", call_sign="", sender="STOWAGE", recipient="TERMINAL",
+                    reference=None, prepared=None, load_port=CONSTANT_COLUMNS['Load Port'],
+                    discharge_port=CONSTANT_COLUMNS['Discharge Port']):
+    """Generator segmen BAPLIE (string, termasuk terminator) dari baris ekspor plan_export.plan_rows."""
+    prepared = prepared or datetime.now()
+    reference = reference or prepared.strftime("%y%m%d%H%M%S")
+    yield _segment("UNB", ("UNOA", "2"), sender, recipient, (prepared.strftime("%y%m%d"), prepared.strftime("%H%M")), reference)
+    count = 0
+
+    def counted(segment):
+        nonlocal count
+        count += 1
+        return segment
+
+    yield counted(_segment("UNH", reference, BAPLIE_MESSAGE_TYPE))
+    yield counted(_segment("BGM", "", reference, "9"))
+    yield counted(_segment("DTM", ("137", prepared.strftime("%y%m%d%H%M"), "201")))
+    yield counted(_segment("TDT", "20", voyage, "", "", (carrier, "172", "20"), "", "", (call_sign, "103", "", vessel)))
+    yield counted(_segment("LOC", "5", (load_port, "139", "6")))
+    yield counted(_segment("LOC", "61", (discharge_port, "139", "6")))
+    for cid, bay, row, tier, iso, weight in rows:
+        yield counted(_segment("LOC", "147", (f"{bay:0>3}{row}{tier}", "", "5")))
+        yield counted(_segment("MEA", "WT", "", ("KGM", round(weight * 1000))))
+        yield counted(_segment("LOC", "9", (load_port, "139", "6")))
+        yield counted(_segment("LOC", "11", (discharge_port, "139", "6")))
+        yield counted(_segment("EQD", "CN", cid, (iso, "102", "5"), "", "", "5"))
+        if carrier: yield counted(_segment("NAD", "CA", (carrier, "172", "20")))
+    yield _segment("UNT", count + 1, reference)
+    yield _segment("UNZ", "1", reference)
+
+def write_baplie(path, rows, **header):
+    """Tulis BAPLIE dari baris plan_rows segmen demi segmen (satu segmen per baris) secara atomik. Return path."""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="ascii", errors="replace", newline="\n") as f:
+            for segment in baplie_segments(rows, **header):
+                f.write(segment + "\n")
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists(): tmp_path.unlink()
+    return path
+
+def export_baplie(engine, plan, TIERS, BAYS, MAX_ROWS, path, **header):
+    """Denah (grid) -> file BAPLIE; header: vessel, voyage, carrier, call_sign, sender, recipient, load_port, ..."""
+    return write_baplie(path, plan_rows(engine, plan, TIERS, BAYS, MAX_ROWS), **header)
+
+# MARK: Reader
+def _split(text, separator, release):
+    """Pisahkan `text` pada separator yang tidak di-escape, lalu hapus karakter release."""
+    parts, current, escaped = [], [], False
+    for ch in text:
+        if escaped: current.append(ch); escaped = False
+        elif ch == release: escaped = True
+        elif ch == separator: parts.append("".join(current)); current = []
+        else: current.append(ch)
+    parts.append("".join(current))
+    return parts
+
+def _split_raw(text, separator, release):
+    """Seperti _split tetapi karakter release dipertahankan (untuk pemisahan elemen sebelum komponen)."""
+    parts, start, i = [], 0, 0
+    while i < len(text):
+        if text[i] == release: i += 2; continue
+        if text[i] == separator: parts.append(text[start:i]); start = i + 1
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+def iter_segments(file_path, chunk_size=1 << 16):
+    """
+    Segmen EDIFACT satu per satu sebagai (tag, [[komponen, ...], ...]) tanpa memuat seluruh file.
+    Separator dibaca dari UNA bila ada; baris baru di antara segmen diabaikan.
+    """
+    sep = dict(DEFAULT_SEPARATORS)
+    with open(file_path, encoding="utf-8", errors="replace") as f:
+        buffer = f.read(max(chunk_size, 9))  # minimal sepanjang UNA
+        if buffer.startswith("UNA") and len(buffer) >= 9:
+            sep.update(component=buffer[3], element=buffer[4], release=buffer[6], segment=buffer[8])
+            buffer = buffer[9:]
+        rel, term = re.escape(sep["release"]), re.escape(sep["segment"])
+        pattern = re.compile(rf"\s*((?:{rel}.|[^{rel}{term}])*){term}", re.S)
+        while True:
+            pos, match = 0, pattern.match(buffer)
+            while match is not None:  # hanya segmen lengkap; sisa buffer disambung dengan chunk berikutnya
+                pos = match.end()
+                if match.group(1):
+                    elements = [_split(e, sep["component"], sep["release"]) for e in _split_raw(match.group(1), sep["element"], sep["release"])]
+                    yield elements[0][0], elements[1:]
+                match = pattern.match(buffer, pos)
+            chunk = f.read(chunk_size)
+            buffer = buffer[pos:] + chunk
+            if not chunk:
+                if buffer.strip(): raise ValueError(f"Segmen BAPLIE tidak lengkap di akhir {file_path}: {buffer.strip()[:40]!r}")
+                return
+
+def _component(elements, index, component=0):
+    try: return elements[index][component]
+    except IndexError: return ""
+
+def iter_baplie_containers(file_path):
+    """
+    Kontainer dari pesan BAPLIE satu per satu: {'id', 'iso', 'size', 'weight' (kg), 'bay', 'row', 'tier',
+    'load_port', 'discharge_port', 'full'}; bay/row/tier berupa label angka dari posisi LOC+147.
+    """
+    current = None
+    for tag, elements in iter_segments(file_path):
+        qualifier = _component(elements, 0)
+        if tag == "LOC" and qualifier == "147":
+            if current is not None: yield current
+            position = _component(elements, 1).strip()
+            current = {"id": None, "iso": None, "size": None, "weight": None, "load_port": None, "discharge_port": None,
+                       "full": True, "bay": None, "row": None, "tier": None}
+            if len(position) >= 6 and position.isdigit():
+                current.update(bay=int(position[:-4]), row=int(position[-4:-2]), tier=int(position[-2:]))
+        elif current is None:
+            continue
+        elif tag in ("UNT", "UNZ"):  # akhir pesan: grup kontainer terakhir selesai
+            yield current
+            current = None
+        elif tag == "MEA" and qualifier in ("WT", "VGM", "AAE"):
+            unit, value = _component(elements, 2, 0), _component(elements, 2, 1)
+            try: current["weight"] = float(value) * WEIGHT_UNITS_KG.get(unit, 1.0)
+            except ValueError: pass
+        elif tag == "LOC" and qualifier in ("9", "11"):
+            current["load_port" if qualifier == "9" else "discharge_port"] = _component(elements, 1) or None
+        elif tag == "EQD" and qualifier == "CN":
+            current["id"], current["iso"] = _component(elements, 1) or None, _component(elements, 2) or None
+            current["size"] = extract_size_from_iso(current["iso"]) if current["iso"] else None
+            current["full"] = _component(elements, 5) != "4"
+    if current is not None: yield current
+
+# MARK: Warm Start & Onboard
+def placements_from_baplie(file_path, BAYS, TIERS, MAX_ROWS):
+    """BAPLIE -> placements {container_id: (t_idx, b_idx, r_idx)} untuk warm start (lihat warm_start.py)."""
+    bay_index, tier_index = {b: i for i, b in enumerate(BAYS)}, {t: i for i, t in enumerate(TIERS)}
+    row_index = {label: i for i, label in enumerate(generate_order(int(MAX_ROWS)))}
+    placements, skipped = {}, 0
+    for container in iter_baplie_containers(file_path):
+        try:
+            bay = container["bay"] - 1 if container["size"] == 40 else container["bay"]  # 40ft ditulis dengan bay genap
+            placements[container["id"]] = (tier_index[container["tier"]], bay_index[bay], row_index[container["row"]])
+        except (KeyError, TypeError):
+            skipped += 1
+    if skipped:
+        print(f"⚠️ {skipped} kontainer di {file_path} tidak dapat dipetakan ke slot kapal dan diabaikan.")
+    return placements
+
+def onboard_containers(file_path):
+    """Muatan onboard dari BAPLIE sebagai records {'id', 'weight', 'size'} (format manifest_records)."""
+    return [{"id": c["id"], "weight": c["weight"], "size": c["size"]}
+            for c in iter_baplie_containers(file_path) if c["id"] is not None]
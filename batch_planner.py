@@ -0,0 +1,281 @@
+"""
+Batch voyage planner (non-interaktif).
+
+Menjalankan banyak job (workbook kapal, workbook kontainer, target LCG, bobot penalti) sekaligus di
+ProcessPoolExecutor, tanpa input(). Geometri tiap kapal yang berbeda dimuat sekali di proses induk
+(lihat ship_data.load_ship_geometry) lalu dibagikan ke worker lewat initializer.
+
+Sumber job:
+  - file .json : list job, atau {"defaults": {...}, "jobs": [...]}
+  - file .csv  : kolom name, ship, containers, target_lcg (+ opsional vertical_moment,
+                 longitudinal_balance, stability_tcg, max_iterations, num_particles, seed,
+                 time_budget, stagnation_iterations, stagnation_epsilon, warm_start, checkpoint_every, engine)
+  - direktori  : setiap *.xlsx = satu manifest kontainer; file <nama>.json di sebelahnya (opsional)
+                 berisi override job tersebut (mis. {"target_lcg": 7.5})
+Path relatif di file job dibaca relatif terhadap lokasi file job. Field warm_start (opsional) menunjuk
+rencana sebelumnya (.xlsx hasil export atau .npz hasil warm_start.save_plan) sebagai titik awal.
+
+Contoh:
+  python batch_planner.py jobs.json --out export/batch --workers 4
+  python batch_planner.py ./manifests --ship ./archive/ship_slot.xlsx --target-lcg 7.5
+
+Hasil per job di folder output: <nama>.xlsx (denah), <nama>.npz (denah untuk warm start berikutnya),
+<nama>.json (ringkasan), <nama>.log (output planner). Dengan checkpoint_every, state swarm disimpan ke
+<nama>.ckpt.npz dan job yang terputus (mis. node preemptible) dilanjutkan dari sana saat batch dijalankan ulang
+(hanya engine "pso"). Field engine memilih engine optimasi ("pso" atau "ga", lihat stowage_engine.ENGINES).
+Ringkasan seluruh batch ditulis ke summary.json.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import traceback
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import pandas as pd
+
+from container_data import count_manifest_sizes, load_manifest, manifest_records
+from formula import summarize_plan
+from npz_cache import CACHE_DIR
+from warm_start import load_placements, save_plan
+from ship_data import (DEFAULT_MAX_ITERATIONS, DEFAULT_NUM_PARTICLES, DEFAULT_WEIGHT_PENALTY, SHIP_XLSX_PATH,
+                       datakondisikapal, load_ship_geometry, unpack_ship_geometry)
+from ship_geometry import ShipGeometry
+from stowage_engine import ENGINES, get_engine
+
+DEFAULT_OUT_DIR = "export/batch"
+JOB_DEFAULTS = {"ship": SHIP_XLSX_PATH, "target_lcg": None, "max_iterations": DEFAULT_MAX_ITERATIONS,
+                "num_particles": DEFAULT_NUM_PARTICLES, "seed": None,
+                "time_budget": None, "stagnation_iterations": None, "stagnation_epsilon": 0.0, "warm_start": None,
+                "checkpoint_every": None, "engine": "pso"}
+
+# MARK: Job Loading
+def _resolve(path, base_dir):
+    path = Path(path)
+    return str(path if path.is_absolute() else base_dir / path)
+
+def _safe_name(name):
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(name)).strip('_') or "job"
+
+def normalize_job(raw, defaults=None, base_dir=Path(".")):
+    """Lengkapi satu job dengan default dan validasi field wajib (containers, target_lcg)."""
+    job = {**JOB_DEFAULTS, **(defaults or {}), **{k: v for k, v in raw.items() if v is not None and v == v}}
+    if "containers" not in job:
+        raise ValueError(f"Job tanpa 'containers': {raw}")
+    if job["target_lcg"] is None:
+        raise ValueError(f"Job '{job.get('name', job['containers'])}' tidak memiliki 'target_lcg'.")
+    if job["engine"] not in ENGINES:
+        raise ValueError(f"Job '{job.get('name', job['containers'])}': engine tidak dikenal '{job['engine']}'.")
+
+    penalty = dict(DEFAULT_WEIGHT_PENALTY)
+    penalty.update((defaults or {}).get("weight_penalty", {}))
+    penalty.update(job.get("weight_penalty", {}))
+    for key in DEFAULT_WEIGHT_PENALTY:  # kolom datar (CSV) meng-override dict
+        if key in job: penalty[key] = float(job.pop(key))
+
+    return {
+        "name": _safe_name(job.get("name") or Path(job["containers"]).stem),
+        "ship": _resolve(raw["ship"], base_dir) if raw.get("ship") else str(job["ship"]),  # default: relatif ke cwd
+        "containers": _resolve(job["containers"], base_dir),
+        "target_lcg": float(job["target_lcg"]),
+        "weight_penalty": penalty,
+        "max_iterations": int(job["max_iterations"]),
+        "num_particles": int(job["num_particles"]),
+        "seed": None if job["seed"] is None else int(job["seed"]),
+        "time_budget": None if job["time_budget"] is None else float(job["time_budget"]),
+        "stagnation_iterations": None if job["stagnation_iterations"] is None else int(job["stagnation_iterations"]),
+        "stagnation_epsilon": float(job["stagnation_epsilon"]),
+        "warm_start": _resolve(job["warm_start"], base_dir) if job["warm_start"] else None,
+        "checkpoint_every": int(job["checkpoint_every"]) if job["checkpoint_every"] else None,
+        "engine": str(job["engine"]),
+    }
+
+def load_jobs(source, defaults=None):
+    """Baca daftar job dari file .json/.csv atau direktori manifest (lihat docstring modul)."""
+    source, defaults = Path(source), dict(defaults or {})
+    if source.is_dir():
+        jobs = []
+        ship = Path(defaults.get("ship", SHIP_XLSX_PATH)).resolve()
+        for manifest in sorted(source.glob("*.xlsx")):
+            if manifest.name.startswith("~$") or manifest.resolve() == ship:
+                continue
+            sidecar = manifest.with_suffix(".json")
+            raw = json.loads(sidecar.read_text()) if sidecar.exists() else {}
+            jobs.append(normalize_job({"containers": manifest.name, **raw}, defaults, source))
+    elif source.suffix.lower() == ".json":
+        data = json.loads(source.read_text())
+        if isinstance(data, dict):
+            file_defaults = dict(data.get("defaults", {}))
+            if "ship" in file_defaults: file_defaults["ship"] = _resolve(file_defaults["ship"], source.parent)
+            defaults.update(file_defaults)
+            data = data["jobs"]
+        jobs = [normalize_job(raw, defaults, source.parent) for raw in data]
+    elif source.suffix.lower() == ".csv":
+        jobs = [normalize_job(raw, defaults, source.parent) for raw in pd.read_csv(source).to_dict("records")]
+    else:
+        raise ValueError(f"Sumber job tidak dikenal: {source} (gunakan direktori, .json, atau .csv)")
+
+    # Nama job dipakai sebagai nama file output -> harus unik
+    seen = {}
+    for job in jobs:
+        base = job["name"]
+        seen[base] = seen.get(base, 0) + 1
+        if seen[base] > 1: job["name"] = f"{base}_{seen[base]}"
+    return jobs
+
+# MARK: Worker
+_BATCH = {}
+
+def _init_batch_worker(geometries, out_dir, cache_dir):
+    _BATCH.update(geometries=geometries, unpacked={}, out_dir=Path(out_dir), cache_dir=cache_dir)
+
+def _ship_for(ship_path):
+    """(ShipGeometry, geometri ter-unpack) per kapal, dibangun sekali per worker."""
+    unpacked = _BATCH["unpacked"]
+    if ship_path not in unpacked:
+        geometry = _BATCH["geometries"][ship_path]
+        if isinstance(geometry, Exception):
+            raise geometry
+        unpacked[ship_path] = (ShipGeometry.from_compiled(geometry), unpack_ship_geometry(geometry))
+    return unpacked[ship_path]
+
+def _write_json(path, data):
+    tmp_path = Path(path).with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(data, indent=2))
+    os.replace(tmp_path, path)
+
+def plan_job(job):
+    """Rencanakan satu job; output planner masuk ke <nama>.log. Tidak pernah raise: error dicatat di hasil."""
+    out_dir, start = _BATCH["out_dir"], time.perf_counter()
+    result = {**job, "status": "error", "plan_file": None, "log_file": str(out_dir / f"{job['name']}.log")}
+    with open(result["log_file"], "w", encoding="utf-8") as log, redirect_stdout(log):
+        try:
+            geometry, (BAYS, TIERS, MAX_ROWS, VALID_SLOT_MASK_20FT, SLOT_PROPERTIES_20FT, VALID_PLACEMENTS_40FT,
+                       SLOT_PROPERTIES_40FT, tanks) = _ship_for(job["ship"])
+            manifest = load_manifest(job["containers"], _BATCH["cache_dir"])
+            NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD = count_manifest_sizes(manifest)
+            lightship_properties, tanks_data = datakondisikapal(tanks)
+            warm_start = load_placements(job["warm_start"], BAYS, TIERS, MAX_ROWS) if job["warm_start"] else None
+
+            stowage_planner = get_engine(job["engine"])(
+                NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD, all_containers=manifest_records(manifest), lightship_data=lightship_properties,
+                tanks_data=tanks_data, slot_properties_20ft=SLOT_PROPERTIES_20FT, valid_mask_20ft=VALID_SLOT_MASK_20FT,
+                valid_placements_40ft=VALID_PLACEMENTS_40FT, slot_properties_40ft=SLOT_PROPERTIES_40FT,
+                target_lcg=job["target_lcg"], seed=job["seed"], geometry=geometry
+            )
+            run_options = dict(time_budget=job["time_budget"], stagnation_iterations=job["stagnation_iterations"],
+                               stagnation_epsilon=job["stagnation_epsilon"], warm_start=warm_start)
+            if job["engine"] == "pso" and job["checkpoint_every"]:
+                run_options.update(checkpoint_path=out_dir / f"{job['name']}.ckpt.npz", checkpoint_every=job["checkpoint_every"], resume=True)
+            best_plan, best_summary = stowage_planner.run(job["max_iterations"], TIERS, job["num_particles"], job["weight_penalty"],
+                                                          **run_options)
+            result.update(stop_reason=stowage_planner.stop_reason, iterations=stowage_planner.iterations_run)
+            summarize_plan(best_summary, job["target_lcg"])
+            if best_plan is None:
+                raise RuntimeError("Tidak ada solusi yang ditemukan.")
+
+            plan_file = out_dir / f"{job['name']}.xlsx"
+            stowage_planner.export_plan_to_excel(best_plan, TIERS, BAYS, MAX_ROWS, plan_file.name, export_dir=out_dir)
+            if not plan_file.exists():
+                raise RuntimeError(f"Denah gagal diekspor ke {plan_file}")
+            save_plan(out_dir / f"{job['name']}.npz", best_plan, stowage_planner.container_ids)
+
+            summary = {k: float(v) for k, v in best_summary.items()}
+            result.update(status="ok", plan_file=str(plan_file), summary=summary,
+                          num_20ft=len(stowage_planner.containers_to_load_20ft), num_40ft=len(stowage_planner.containers_to_load_40ft),
+                          lcg_diff=abs(summary["ship_lcg"] - job["target_lcg"]),
+                          lcg_ok=abs(summary["ship_lcg"] - job["target_lcg"]) < 1.0, tcg_ok=abs(summary["ship_tcg"]) < 0.2)
+        except Exception as e:
+            traceback.print_exc(file=sys.stdout)  # ke <nama>.log
+            result["error"] = f"{type(e).__name__}: {e}"
+    result["elapsed_s"] = round(time.perf_counter() - start, 3)
+    _write_json(out_dir / f"{job['name']}.json", result)
+    return result
+
+# MARK: Batch
+def run_batch(jobs, out_dir=DEFAULT_OUT_DIR, n_workers=None, cache_dir=CACHE_DIR):
+    """
+    Jalankan semua job; n_workers=1 berjalan di proses ini. Return dict ringkasan batch
+    (juga ditulis ke <out_dir>/summary.json), urutan hasil = urutan job.
+    """
+    out_dir, start = Path(out_dir), time.perf_counter()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Geometri tiap kapal berbeda dimuat sekali (dari cache .npz bila ada); error dicatat per kapal
+    geometries = {}
+    for ship in dict.fromkeys(job["ship"] for job in jobs):
+        try:
+            geometries[ship] = load_ship_geometry(ship, cache_dir)
+        except Exception as e:
+            print(f"❌ Gagal memuat geometri kapal {ship}: {e}")
+            geometries[ship] = e
+    print(f"🚢 {len(jobs)} job, {len(geometries)} kapal berbeda")
+
+    n_workers = max(1, min(n_workers or os.cpu_count() or 1, len(jobs) or 1))
+    results = [None] * len(jobs)
+    if n_workers == 1:
+        _init_batch_worker(geometries, out_dir, cache_dir)
+        for k, job in enumerate(jobs):
+            results[k] = plan_job(job)
+            _report(results[k], k + 1, len(jobs))
+    else:
+        with ProcessPoolExecutor(n_workers, initializer=_init_batch_worker, initargs=(geometries, str(out_dir), cache_dir)) as executor:
+            futures = {executor.submit(plan_job, job): k for k, job in enumerate(jobs)}
+            for done, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                _report(results[futures[future]], done, len(jobs))
+
+    n_ok = sum(r["status"] == "ok" for r in results)
+    batch_summary = {"jobs": results, "n_jobs": len(jobs), "n_ok": n_ok, "n_failed": len(jobs) - n_ok,
+                     "n_workers": n_workers, "elapsed_s": round(time.perf_counter() - start, 3)}
+    _write_json(out_dir / "summary.json", batch_summary)
+    print(f"✅ Batch selesai: {n_ok}/{len(jobs)} berhasil dalam {batch_summary['elapsed_s']:.1f} s -> {out_dir / 'summary.json'}")
+    return batch_summary
+
+def _report(result, done, total):
+    if result["status"] == "ok":
+        print(f"   [{done}/{total}] ✅ {result['name']}: fitness {result['summary']['fitness']:.2f}, "
+              f"LCG {result['summary']['ship_lcg']:.3f} (target {result['target_lcg']}) - {result['elapsed_s']:.1f} s")
+    else:
+        print(f"   [{done}/{total}] ❌ {result['name']}: {result['error']} (lihat {result['log_file']})")
+
+# MARK: CLI
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch stowage planner non-interaktif.")
+    parser.add_argument("jobs", help="File job (.json/.csv) atau direktori berisi manifest *.xlsx")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR, help="Folder output (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses worker (default: jumlah CPU)")
+    parser.add_argument("--ship", help="Default workbook kapal untuk job tanpa 'ship'")
+    parser.add_argument("--target-lcg", type=float, help="Default target LCG untuk job tanpa 'target_lcg'")
+    parser.add_argument("--iterations", type=int, help="Default MAX_ITERATIONS")
+    parser.add_argument("--particles", type=int, help="Default NUM_PARTICLES")
+    parser.add_argument("--seed", type=int, help="Default seed RNG planner")
+    parser.add_argument("--time-budget", type=float, help="Default batas waktu per job (detik)")
+    parser.add_argument("--stagnation", type=int, help="Default: berhenti bila gbest tidak membaik selama N iterasi")
+    parser.add_argument("--checkpoint-every", type=int, help="Simpan checkpoint swarm tiap N iterasi & lanjutkan job yang terputus")
+    parser.add_argument("--engine", choices=list(ENGINES), help="Default engine optimasi (default: pso)")
+    parser.add_argument("--no-cache", action="store_true", help="Jangan pakai cache .npz geometri/manifest")
+    args = parser.parse_args(argv)
+
+    defaults = {k: v for k, v in {"ship": args.ship, "target_lcg": args.target_lcg, "max_iterations": args.iterations,
+                                  "num_particles": args.particles, "seed": args.seed, "time_budget": args.time_budget,
+                                  "stagnation_iterations": args.stagnation, "checkpoint_every": args.checkpoint_every,
+                                  "engine": args.engine}.items() if v is not None}
+    try:
+        jobs = load_jobs(args.jobs, defaults)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Gagal membaca job: {e}")
+        return 2
+    if not jobs:
+        print("⚠️ Tidak ada job.")
+        return 0
+    batch_summary = run_batch(jobs, args.out, args.workers, None if args.no_cache else CACHE_DIR)
+    return 0 if batch_summary["n_failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""
+Benchmark hot path stowage planner pada kapal sintetis (feeder s.d. ~20k TEU).
+
+Generator kapal menulis workbook dengan struktur sama seperti archive/ship_slot.xlsx
+(sheet Bays/Tiers/Rows/Slots/Tanks), generator manifest menulis workbook kontainer seperti
+archive/container.xlsx. Yang diukur per ukuran kapal:
+  - compile_ship_geometry / ship_data() (cache dingin & hangat)
+  - konstruksi PSO_Stowage_Planner
+  - _repair_plan (cache slot aman dingin & hangat), _calculate_fitness
+  - run(): setup (base plan + inisialisasi swarm) dan waktu per iterasi penuh
+  - export_plan_to_excel
+  - opsional (--engines pso ga): setiap engine dijalankan --engine-budget detik dan dibandingkan dengan
+    time-to-target, yaitu detik hingga gbest mencapai fitness akhir terburuk di antara engine tersebut
+
+Hasil ditulis ke JSON (default export/benchmark/benchmark_<waktu>.json); --compare membandingkan
+dengan JSON dari commit lain.
+
+Contoh:
+  python benchmark.py --sizes feeder panamax --repeat 3
+  python benchmark.py --compare export/benchmark/benchmark_lama.json
+  python benchmark.py --sizes panamax --engines pso ga --engine-budget 20
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import container_data
+from container_data import load_manifest, manifest_records
+from ship_data import DEFAULT_WEIGHT_PENALTY, compile_ship_geometry, datakondisikapal, ship_data
+from stowage_engine import ENGINES, get_engine
+
+# Ukuran kapal sintetis: jumlah bay 20ft (ganjil 01, 03, ...), row, tier palka & tier dek
+SHIP_SIZES = {
+    "feeder":      {"bays": 16, "rows": 9,  "hold_tiers": 4,  "deck_tiers": 4},   # ~1.1k TEU
+    "feedermax":   {"bays": 20, "rows": 11, "hold_tiers": 5,  "deck_tiers": 5},   # ~2.1k TEU
+    "panamax":     {"bays": 28, "rows": 13, "hold_tiers": 6,  "deck_tiers": 6},   # ~4.2k TEU
+    "neo_panamax": {"bays": 36, "rows": 17, "hold_tiers": 8,  "deck_tiers": 7},   # ~8.8k TEU
+    "ulcv":        {"bays": 48, "rows": 23, "hold_tiers": 10, "deck_tiers": 8},   # ~19k TEU
+}
+BAY_LENGTH, BAY_GAP_40FT = 6.134, 1.5   # jarak LCG antar bay 20ft dalam satu pasangan 40ft / antar pasangan (m)
+TIER_HEIGHT, HATCH_CLEARANCE = 2604, 1284  # mm
+ROW_WIDTH = 2518                          # mm
+RUN_ITERATIONS = 10                       # iterasi pada metrik "run"; "iteration" = (run - run_setup) / RUN_ITERATIONS
+
+# MARK: Synthetic Ship
+def _row_names(num_rows):
+    """Nama row dari port ke starboard, pola seperti ship_slot.xlsx: ..., 4, 2, (0), 1, 3, ..."""
+    port = list(range(num_rows - 1 if num_rows % 2 else num_rows, 1, -2))
+    starboard = list(range(1, num_rows, 2))
+    return port + ([0] if num_rows % 2 else []) + starboard
+
+def generate_ship_workbook(path, bays, rows, hold_tiers, deck_tiers, seed=0):
+    """Tulis workbook kapal sintetis. Palka di dua bay terdepan/terbelakang menyempit (row terluar dibuang)."""
+    rng = np.random.default_rng(seed)
+    bay_ids = [2 * k + 1 for k in range(bays)]
+    length = bays * BAY_LENGTH + (bays // 2) * BAY_GAP_40FT
+    bay_lcg = [-length / 2 + k * BAY_LENGTH + (k // 2) * BAY_GAP_40FT for k in range(bays)]
+    df_bays = pd.DataFrame({
+        "No.": range(1, bays + 1), "Name": [f"Bay {b:02d}" for b in bay_ids],
+        "Inhold": True, "LPP": length, "Midship": length / 2, "Base LCG - Midship": np.round(bay_lcg, 6),
+    })
+
+    tier_ids = [2 * (k + 1) for k in range(hold_tiers)] + [82 + 2 * k for k in range(deck_tiers)]
+    tier_vcg = [1532 + k * TIER_HEIGHT for k in range(hold_tiers)]
+    tier_vcg += [tier_vcg[-1] + TIER_HEIGHT + HATCH_CLEARANCE + k * TIER_HEIGHT for k in range(deck_tiers)]
+    df_tiers = pd.DataFrame({
+        "No.": range(1, len(tier_ids) + 1), "Name": [f"TIER {t:02d}" for t in tier_ids],
+        "Inhold": [t < 82 for t in tier_ids], "Base VCG": tier_vcg,
+    })
+
+    names = _row_names(rows)
+    center = (rows - 1) / 2
+    df_rows = pd.DataFrame({"No.": range(1, rows + 1), "Name": names,
+                            "Base TCG": [round((k - center) * ROW_WIDTH) for k in range(rows)]})
+
+    # Slot per (bay, tier, row); Link Slot = slot pasangan 40ft (NaN bila pasangannya tidak ada)
+    slots = {}
+    for k, bay in enumerate(bay_ids):
+        taper = 2 if k < 2 or k >= bays - 2 else 0
+        for tier in tier_ids:
+            trim = taper if tier < 82 else 0
+            for name in names[trim:rows - trim]:
+                slots[(bay, tier, name)] = len(slots)
+    records = []
+    for (bay, tier, name), slot_id in slots.items():
+        link_bay = bay + 2 if (bay // 2) % 2 == 0 else bay - 2
+        records.append({"No.": slot_id + 1, "Slot ID": slot_id, "Bay": bay, "Row": name, "Tier": tier,
+                        "Link Bay": link_bay, "Link Slot": slots.get((link_bay, tier, name), np.nan)})
+    df_slots = pd.DataFrame(records)
+
+    num_tanks = 6 + bays // 4
+    df_tanks = pd.DataFrame({
+        "No.": range(1, num_tanks + 1), "Name": [f"WBT {k + 1}" for k in range(num_tanks)],
+        "Weight": np.round(rng.uniform(20, 400, num_tanks), 3),
+        "LCG": np.round(rng.uniform(-length / 2, length / 2, num_tanks), 3),
+        "VCG": np.round(rng.uniform(1, 6, num_tanks), 3), "TCG": 0.0,
+        "Lightship Weight": round(2000 + 1.6 * len(slots), 3), "Lightship LCG": round(-0.05 * length, 3),
+        "Lightship VCG": round(tier_vcg[hold_tiers - 1] / 1000, 3), "Lightship TCG": 0,
+    })
+
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for sheet, df in (("Bays", df_bays), ("Tiers", df_tiers), ("Rows", df_rows), ("Slots", df_slots), ("Tanks", df_tanks)):
+            df.to_excel(writer, index=False, sheet_name=sheet)
+    return len(slots)
+
+def generate_manifest_workbook(path, num_20ft, num_40ft, seed=0):
+    """Tulis manifest kontainer sintetis (kolom seperti archive/container.xlsx), VGM acak 2-30 ton."""
+    rng = np.random.default_rng(seed)
+    total = num_20ft + num_40ft
+    iso = np.array(["22G1"] * num_20ft + ["45G1"] * num_40ft)[rng.permutation(total)]
+    df = pd.DataFrame({
+        "No.": range(1, total + 1), "Load Port": "IDJKT", "Discharge Port": "IDSUB", "Container ISO": iso, "F/E": "F",
+        "Weight (VGM)": np.round(rng.uniform(2.0, 30.0, total), 2),
+    })
+    df.to_excel(path, index=False, sheet_name="Container")
+
+# MARK: Timing
+def _timeit(fn, repeat, setup=None):
+    """Jalankan fn `repeat` kali (setup tidak ikut diukur). Return (statistik waktu, hasil terakhir)."""
+    times, result = [], None
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        result = fn(state) if setup else fn()
+        times.append(time.perf_counter() - start)
+    return {"min_s": min(times), "median_s": statistics.median(times), "runs": len(times)}, result
+
+def _clear_caches():
+    shutil.rmtree("export/cache", ignore_errors=True)
+    container_data._MANIFEST_MEMO.clear()
+
+def bench_size(name, spec, repeat, particles, fill, seed, engines=None, engine_budget=10.0):
+    """Bangun kapal + manifest sintetis di cwd lalu ukur semua hot path. Output planner dibuang."""
+    ship_path, manifest_path = f"synthetic/{name}_ship.xlsx", f"synthetic/{name}_containers.xlsx"
+    Path("synthetic").mkdir(exist_ok=True)
+    num_slots = generate_ship_workbook(ship_path, seed=seed, **spec)
+    geometry = compile_ship_geometry(ship_path)
+    num_placements_40ft = len(geometry["placements_40ft"])
+    num_40ft = int(min(num_placements_40ft, fill * num_slots) * 0.35)
+    num_20ft = int(fill * num_slots) - 2 * num_40ft
+    generate_manifest_workbook(manifest_path, num_20ft, num_40ft, seed=seed)
+
+    timings = {}
+    timings["compile_ship_geometry"], _ = _timeit(lambda: compile_ship_geometry(ship_path), repeat)
+    timings["ship_data_cold"], _ = _timeit(lambda _: ship_data(ship_path, manifest_path), repeat, setup=_clear_caches)
+    timings["ship_data_warm"], data = _timeit(lambda: ship_data(ship_path, manifest_path), repeat)
+    (_, NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD, SLOT_PROPERTIES_20FT, VALID_SLOT_MASK_20FT, VALID_PLACEMENTS_40FT,
+     SLOT_PROPERTIES_40FT, _, TIERS, _, _, BAYS, MAX_ROWS, tanks) = data
+    lightship_properties, tanks_data = datakondisikapal(tanks)
+    all_containers = manifest_records(load_manifest(manifest_path))
+    WEIGHT_PENALTY = dict(DEFAULT_WEIGHT_PENALTY)
+
+    def new_planner(engine="pso"):
+        return get_engine(engine)(
+            NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD, all_containers=all_containers, lightship_data=lightship_properties,
+            tanks_data=tanks_data, slot_properties_20ft=SLOT_PROPERTIES_20FT, valid_mask_20ft=VALID_SLOT_MASK_20FT,
+            valid_placements_40ft=VALID_PLACEMENTS_40FT, slot_properties_40ft=SLOT_PROPERTIES_40FT, target_lcg=0.0, seed=seed)
+
+    timings["planner_init"], planner = _timeit(new_planner, repeat)
+    plan = planner._create_base_plan(TIERS)
+
+    def cold_cache():
+        planner._init_safe_slot_cache(planner.safe_slot_cache_size)
+    timings["repair_plan_cold"], _ = _timeit(lambda _: planner._repair_plan(plan, TIERS), repeat, setup=cold_cache)
+    timings["repair_plan"], _ = _timeit(lambda: planner._repair_plan(plan, TIERS), max(repeat, 10))
+    timings["calculate_fitness"], _ = _timeit(lambda: planner._calculate_fitness(plan, WEIGHT_PENALTY), max(repeat, 10))
+
+    timings["run_setup"], _ = _timeit(lambda p: p.run(0, TIERS, particles, WEIGHT_PENALTY), repeat, setup=new_planner)
+    timings["run"], (best_plan, _) = _timeit(lambda p: p.run(RUN_ITERATIONS, TIERS, particles, WEIGHT_PENALTY), repeat, setup=new_planner)
+    timings["iteration"] = {k: max(0.0, timings["run"][k] - timings["run_setup"][k]) / RUN_ITERATIONS for k in ("min_s", "median_s")}
+
+    timings["export_plan_to_excel"], _ = _timeit(
+        lambda: planner.export_plan_to_excel(best_plan, TIERS, BAYS, MAX_ROWS, f"{name}_plan.xlsx", export_dir="synthetic"), repeat)
+
+    # Perbandingan engine: target = fitness akhir terburuk, sehingga setiap engine punya time-to-target
+    engine_results, runs = {}, {}
+    for engine_name in engines or ():
+        runs[engine_name] = engine = new_planner(engine_name)
+        engine.run(None, TIERS, particles, WEIGHT_PENALTY, time_budget=engine_budget)
+    if runs:
+        target = max(engine.gbest_fitness for engine in runs.values())
+        engine_results = {engine_name: {"fitness": engine.gbest_fitness, "iterations": engine.iterations_run,
+                                        "target_fitness": target, "time_to_target_s": engine.time_to_target(target)}
+                          for engine_name, engine in runs.items()}
+
+    return {
+        "size": name, **spec, "slots_20ft": num_slots, "placements_40ft": num_placements_40ft,
+        "grid_shape": list(VALID_SLOT_MASK_20FT.shape), "num_20ft": NUM_20FT_TO_LOAD, "num_40ft": NUM_40FT_TO_LOAD,
+        "particles": particles, "timings": timings, "engines": engine_results,
+    }
+
+# MARK: Report
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(results):
+    metrics = list(results[0]["timings"])
+    print(f"\n{'metrik (median, s)':<24}" + "".join(f"{r['size']:>14}" for r in results))
+    print(f"{'slot 20ft':<24}" + "".join(f"{r['slots_20ft']:>14}" for r in results))
+    for metric in metrics:
+        print(f"{metric:<24}" + "".join(f"{r['timings'][metric]['median_s']:>14.5f}" for r in results))
+
+def compare_results(results, baseline_path, threshold=1.2):
+    """Rasio median baru/lama per (ukuran, metrik); rasio > threshold ditandai sebagai regresi."""
+    baseline = {r["size"]: r for r in json.loads(Path(baseline_path).read_text())["results"]}
+    print(f"\n--- Perbandingan dengan {baseline_path} (rasio baru/lama, > {threshold} = regresi) ---")
+    regressions = 0
+    for r in results:
+        old = baseline.get(r["size"])
+        if old is None: continue
+        for metric, t in r["timings"].items():
+            if metric not in old["timings"] or not old["timings"][metric]["median_s"]: continue
+            ratio = t["median_s"] / old["timings"][metric]["median_s"]
+            flag = "⚠️" if ratio > threshold else "  "
+            regressions += ratio > threshold
+            print(f"{flag} {r['size']:<12} {metric:<24} {ratio:7.2f}x")
+    return regressions
+
+# MARK: CLI
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark planner pada kapal sintetis.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SHIP_SIZES), default=list(SHIP_SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="Pengulangan per metrik (default: %(default)s)")
+    parser.add_argument("--particles", type=int, default=50, help="NUM_PARTICLES untuk run() (default: %(default)s)")
+    parser.add_argument("--fill", type=float, default=0.8, help="Fraksi TEU yang dimuat (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="File JSON hasil (default: export/benchmark/benchmark_<waktu>.json)")
+    parser.add_argument("--compare", help="JSON benchmark lama untuk dibandingkan")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), help="Bandingkan engine dengan time-to-target")
+    parser.add_argument("--engine-budget", type=float, default=10.0, help="Detik per engine untuk --engines (default: %(default)s)")
+    parser.add_argument("--workdir", help="Folder kerja workbook sintetis & cache (default: folder sementara)")
+    args = parser.parse_args(argv)
+
+    out_path = Path(args.out or f"export/benchmark/benchmark_{datetime.now():%Y%m%d_%H%M%S}.json").resolve()
+    compare_path = Path(args.compare).resolve() if args.compare else None
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="stowage_bench_")).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    # Semua path relatif (export/cache, export/debug_txt, synthetic/) diarahkan ke workdir
+    results, cwd = [], os.getcwd()
+    os.chdir(workdir)
+    try:
+        for name in args.sizes:
+            print(f"⏱️  Benchmark {name} ...", flush=True)
+            with redirect_stdout(io.StringIO()):
+                result = bench_size(name, SHIP_SIZES[name], args.repeat, args.particles, args.fill, args.seed,
+                                     args.engines, args.engine_budget)
+            results.append(result)
+            print(f"   {result['slots_20ft']} slot 20ft, {result['num_20ft']}x20ft + {result['num_40ft']}x40ft, "
+                  f"iterasi {result['timings']['iteration']['median_s']:.3f} s")
+            for engine_name, e in result["engines"].items():
+                reached = f"{e['time_to_target_s']:.3f} s" if e["time_to_target_s"] is not None else "-"
+                print(f"   {engine_name:<4} fitness {e['fitness']:.2f} ({e['iterations']} iterasi), "
+                      f"time-to-target {e['target_fitness']:.2f}: {reached}")
+    finally:
+        os.chdir(cwd)
+        if not args.workdir: shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {"commit": _git_commit(), "timestamp": datetime.now().isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                 "platform": platform.platform(), "cpu_count": os.cpu_count(),
+                 "repeat": args.repeat, "particles": args.particles, "fill": args.fill, "seed": args.seed},
+        "results": results,
+    }
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, indent=2))
+    print_results(results)
+    print(f"\n💾 Hasil benchmark: {out_path}")
+    if compare_path:
+        return 1 if compare_results(results, compare_path) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,16 @@
 import os
 import re
 import math
+import numpy as np
 import pandas as pd
 from typing import Any, Dict, List, Tuple
 
+from format_containerexcel import build_container_id, extract_size_from_iso
+from npz_cache import CACHE_DIR, cache_path_for, load_npz, save_npz_atomic
+
+MANIFEST_CACHE_VERSION = 1
+_MANIFEST_MEMO: Dict[Any, Dict[str, np.ndarray]] = {}  # path cache -> manifest, berlaku dalam satu proses
+
 def _norm_header(s: str) -> str:
     s = str(s).strip().lower()
     return re.sub(r"[^\w]+", "_", s).strip("_")
@@ -143,3 +150,59 @@ def count_containers(containers):
         elif iso == 4:
             count_40ft += 1
     return count_20ft, count_40ft
+
+# MARK: Manifest (Columnar)
+def parse_manifest(file_path: str = "./archive/container.xlsx") -> Dict[str, np.ndarray]:
+    """
+    Parse manifest kontainer (sheet pertama) sekali menjadi tabel kolumnar bertipe:
+    id (CONT0001, ...), weight (kg = Weight (VGM) x 1000, float64), size (20/40, 0 jika ISO tidak dikenal, int16).
+    """
+    df = pd.read_excel(file_path, sheet_name=0, engine="openpyxl")
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    col_iso = next((c for c in df.columns if c in ["container iso", "container_iso", "containeriso"]), None)
+    col_vgm = next((c for c in df.columns if c in ["weight (vgm)", "weight_vgm", "weight vgm", "vgm"]), None)
+    if col_iso is None or col_vgm is None:
+        raise ValueError(
+            f"Kolom wajib tidak ditemukan. Ditemukan kolom: {list(df.columns)}. "
+            "Pastikan ada 'Container ISO' dan 'Weight (VGM)'."
+        )
+
+    sizes = df[col_iso].apply(extract_size_from_iso)
+    if sizes.isna().any():
+        print(f"Peringatan: {int(sizes.isna().sum())} baris tidak dapat ditentukan Size dari 'Container ISO'.")
+    return {
+        "version": np.array(MANIFEST_CACHE_VERSION),
+        "id": np.array([build_container_id(i + 1) for i in range(len(df))], dtype=str),
+        "weight": df[col_vgm].astype(float).to_numpy() * 1000,
+        "size": sizes.fillna(0).to_numpy(dtype=np.int16),
+    }
+
+def load_manifest(file_path: str = "./archive/container.xlsx", cache_dir=CACHE_DIR) -> Dict[str, np.ndarray]:
+    """
+    Manifest kolumnar dengan cache .npz berkunci hash isi workbook; Excel hanya dibaca saat file berubah.
+    Dalam satu proses hasilnya juga di-memo, jadi ship_data() dan get_containers() berbagi satu hasil parse.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File tidak ditemukan: {file_path}")
+    if cache_dir is None:
+        return parse_manifest(file_path)
+
+    cache_path = cache_path_for(file_path, "manifest", cache_dir)
+    manifest = _MANIFEST_MEMO.get(cache_path)
+    if manifest is None:
+        manifest = load_npz(cache_path, MANIFEST_CACHE_VERSION)
+        if manifest is None:
+            manifest = parse_manifest(file_path)
+            save_npz_atomic(cache_path, manifest)
+            print(f"💾 Manifest kontainer di-cache: {cache_path}")
+        _MANIFEST_MEMO[cache_path] = manifest
+    return manifest
+
+def count_manifest_sizes(manifest) -> Tuple[int, int]:
+    """Jumlah kontainer (20ft, 40ft) pada manifest kolumnar."""
+    return int(np.count_nonzero(manifest["size"] == 20)), int(np.count_nonzero(manifest["size"] == 40))
+
+def manifest_records(manifest) -> List[Dict[str, Any]]:
+    """Manifest kolumnar -> list[{'id', 'weight', 'size'}] untuk PSO_Stowage_Planner."""
+    return [{"id": cid, "weight": weight, "size": size or None}
+            for cid, weight, size in zip(manifest["id"].tolist(), manifest["weight"].tolist(), manifest["size"].tolist())]
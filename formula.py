@@ -3,7 +3,8 @@ import os
 import pandas as pd
 import random
 
-from format_containerexcel import make_csv_from_excel
+from container_data import load_manifest, manifest_records
+from plan_render import render_tier_map
 
 # MARK: Build ship geo
 def build_ship_geometry(TIERS, BAYS, MAX_ROWS, SHIP_LAYOUT, ROW_MAP, BAY_MAP, TIER_MAP):
@@ -109,19 +110,16 @@ def summarize_plan(summary, target_lcg):
     print(f"   - TCG Total: {final_tcg:.4f} m (Target: |TCG| < 0.2 m) - Status: {tcg_status}")
 
 # MARK: Get Containers
-def get_containers(TOTAL_VALID_SLOTS_20FT):
+def get_containers(TOTAL_VALID_SLOTS_20FT, xlsx_filename=os.path.join("./archive", "container.xlsx")):
     EXPORT_DIR = "export"
     os.makedirs(EXPORT_DIR, exist_ok=True)
 
     # Ganti nama file ini dengan nama file data kontainer Anda
     csv_filename = os.path.join(EXPORT_DIR, "containers.csv")
-    xlsx_filename = os.path.join("./archive", "container.xlsx")
     if os.path.exists(xlsx_filename):
         print("Ada file excel")
-        make_csv_from_excel("./archive/container.xlsx", "./export/containers_mapped.csv")
-        csv_filename = os.path.join(EXPORT_DIR, "containers_mapped.csv")
-        all_containers = load_containers_from_csv(csv_filename) 
-        return all_containers
+        # Manifest di-parse sekali (dan di-cache) lalu langsung dipakai, tanpa round-trip Excel -> CSV -> DataFrame
+        return manifest_records(load_manifest(xlsx_filename))
     
     else:
         # Membuat file CSV dummy jika tidak ada, untuk keperluan pengujian
@@ -157,68 +155,7 @@ def calculate_lcg():
     return target_lcg_value
 
 # MARK: Formula Best Plan
-def print_bestplan(best_plan, stowage_planner, BAYS, TIERS, MAX_ROWS, VALID_SLOT_MASK_20FT):
+def print_bestplan(best_plan, stowage_planner, BAYS, TIERS, MAX_ROWS, VALID_SLOT_MASK_20FT, tiers=None, bays=None):
+    """Cetak denah per tier (lihat plan_render.render_tier_map); tiers / bays membatasi tier dan bay yang dicetak."""
     print("\n\n--- 🗂️ Denah Muatan Lengkap (Tampilan per Tier dari Atas ke Bawah) ---")
-    CELL_WIDTH = 12
-    for tier_id in sorted(TIERS, reverse=True):
-        t_idx = TIERS.index(tier_id)
-        tier_plan = best_plan[t_idx, :, :]
-        if np.any(tier_plan != 0):
-            print(f"\n\n--- Denah untuk Tier {tier_id:02d} ---")
-            header = "Row".ljust(CELL_WIDTH)
-            b_idx = 0
-            while b_idx < len(BAYS):
-                bay_id = BAYS[b_idx]
-                if b_idx + 1 < len(BAYS) and BAYS[b_idx+1] == bay_id + 2:
-                    header += f"Bay{bay_id+1:02d} (40ft)".center(CELL_WIDTH * 2)
-                    b_idx += 2
-                else: header += f"Bay{bay_id:02d}".ljust(CELL_WIDTH); b_idx += 1
-            print(header); print("-" * len(header))
-            
-            print("MAX_ROWS", MAX_ROWS)
-            evens = list(range(MAX_ROWS - 1, -1, -1))  # 8..0
-            evens = [n for n in evens if n % 2 == 0]
-            odds = [n for n in range(MAX_ROWS) if n % 2 == 1]
-            order = evens + odds
-
-            # Kalau row ganjil
-            if MAX_ROWS%2 != 0:
-                for i, r_idx in enumerate(range(MAX_ROWS)):
-                    row_str, has_content = "", False
-                    b_idx_print = 0
-                    while b_idx_print < len(BAYS):
-                        coords = (t_idx, b_idx_print, r_idx)
-                        if VALID_SLOT_MASK_20FT[coords]:
-                            content_val = tier_plan[b_idx_print, r_idx]
-                            if content_val != 0 and content_val != 'OCCUPIED_40FT':
-                                container = stowage_planner.container_dict[content_val]
-                                if container['size'] == 40:
-                                    has_content = True
-                                    row_str += f"{str(content_val)}".center(CELL_WIDTH * 2)
-                                    b_idx_print += 2; continue
-                                else: has_content = True; row_str += str(content_val).ljust(CELL_WIDTH)
-                            else: row_str += ".".ljust(CELL_WIDTH)
-                        else: row_str += "".ljust(CELL_WIDTH)
-                        b_idx_print += 1
-                    if has_content: print(f"Row {order[i]:02d}".ljust(CELL_WIDTH) + row_str)
-            
-            # Kalau row genap
-            else:
-                for i, r_idx in enumerate(range(MAX_ROWS)):
-                    row_str, has_content = "", False
-                    b_idx_print = 0
-                    while b_idx_print < len(BAYS):
-                        coords = (t_idx, b_idx_print, r_idx)
-                        if VALID_SLOT_MASK_20FT[coords]:
-                            content_val = tier_plan[b_idx_print, r_idx]
-                            if content_val != 0 and content_val != 'OCCUPIED_40FT':
-                                container = stowage_planner.container_dict[content_val]
-                                if container['size'] == 40:
-                                    has_content = True
-                                    row_str += f"{str(content_val)}".center(CELL_WIDTH * 2)
-                                    b_idx_print += 2; continue
-                                else: has_content = True; row_str += str(content_val).ljust(CELL_WIDTH)
-                            else: row_str += ".".ljust(CELL_WIDTH)
-                        else: row_str += "".ljust(CELL_WIDTH)
-                        b_idx_print += 1
-                    if has_content: print(f"Row {(int(order[i]+1)):02d}".ljust(CELL_WIDTH) + row_str)
\ No newline at end of file
+    print(render_tier_map(stowage_planner, best_plan, BAYS, TIERS, MAX_ROWS, VALID_SLOT_MASK_20FT, tiers=tiers, bays=bays))
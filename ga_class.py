@@ -0,0 +1,150 @@
+import itertools
+import time
+
+import numpy as np
+
+from stowage_engine import (EMPTY_SLOT, INIT_BALANCED, STOP_MAX_ITERATIONS, STOP_STAGNATION, STOP_TIME_BUDGET,
+                            StowageEngine)
+
+class GA_Stowage_Planner(StowageEngine):
+    """
+    Algoritma genetika untuk Stowage Planning. Okupansi denah awal (_initial_plan / warm start) dipertahankan,
+    sehingga kromosom cukup berupa permutasi kontainer 40ft atas daftar kepala 40ft denah itu (gen di luar
+    jumlah kepala = kontainer tidak termuat); 20ft mengikuti repair, atau _solve_20ft bila exact_20ft.
+    Seleksi turnamen, order crossover (OX) dan mutasi swap dijalankan untuk seluruh populasi sekaligus.
+    """
+    def __init__(self, NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD,
+                    all_containers, lightship_data, tanks_data,
+                    slot_properties_20ft, valid_mask_20ft,
+                    valid_placements_40ft, slot_properties_40ft, target_lcg, consistency_check=False, seed=None,
+                    safe_slot_cache_size=256, initializer=INIT_BALANCED, exact_20ft=False, geometry=None, crossover_rate=0.9,
+                    mutation_rate=0.3, mutation_swaps=2, elite=2, tournament_size=3, init_swaps=25):
+        # GA: peluang crossover & mutasi per anak, jumlah swap per mutasi, individu elit, ukuran turnamen
+        self.crossover_rate, self.mutation_rate, self.mutation_swaps = crossover_rate, mutation_rate, mutation_swaps
+        self.elite, self.tournament_size, self.init_swaps = elite, tournament_size, init_swaps
+        super().__init__(NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD, all_containers, lightship_data, tanks_data,
+                         slot_properties_20ft, valid_mask_20ft, valid_placements_40ft, slot_properties_40ft, target_lcg,
+                         consistency_check=consistency_check, seed=seed, safe_slot_cache_size=safe_slot_cache_size,
+                         initializer=initializer, exact_20ft=exact_20ft, geometry=geometry)
+
+    # MARK: Kromosom
+    # Gen = indeks ke self._ids_40ft; genome[k] untuk k < len(self._gene_heads) menempati kepala self._gene_heads[k].
+    def _setup_genome(self, base_plan):
+        """Simpan okupansi denah dasar (kepala 40ft & penugasan 20ft) dan return kromosom denah tersebut."""
+        assignment = self._encode_plan(base_plan)
+        slots = assignment[self._ids_40ft]
+        placed = np.flatnonzero(slots >= 0)
+        self._base_assignment, self._gene_heads = assignment, slots[placed]
+        self._gene_props = self._props_40ft[:, self._gene_heads]
+        self._rest_moments = self._assignment_moments(assignment, self._ids_20ft)  # 20ft tetap selama okupansi 40ft tetap
+        return np.concatenate((placed, np.flatnonzero(slots < 0)))
+
+    def _genome_assignment(self, genome, WEIGHT_PENALTY, TIERS):
+        """Kromosom -> vektor penugasan (20ft dari denah dasar, atau diselesaikan eksak bila exact_20ft)."""
+        assignment = self._base_assignment.copy()
+        assignment[self._ids_40ft] = EMPTY_SLOT
+        assignment[self._ids_40ft[genome[:len(self._gene_heads)]]] = self._gene_heads
+        if self.exact_20ft: self._solve_20ft(assignment, self._assignment_moments(assignment), WEIGHT_PENALTY, TIERS)
+        return assignment
+
+    def _evaluate(self, population, WEIGHT_PENALTY, TIERS):
+        """Fitness & ringkasan seluruh populasi; momen 40ft dihitung sekaligus sebagai (populasi, kepala) @ (kepala, 3)."""
+        if self.exact_20ft:
+            moments = np.array([self._assignment_moments(self._genome_assignment(genome, WEIGHT_PENALTY, TIERS)) for genome in population])
+            return self._fitness_from_moments_batch(moments, WEIGHT_PENALTY)
+        weights = self.container_weights[self._ids_40ft[population[:, :len(self._gene_heads)]]]
+        moments = np.empty((len(population), 4))
+        moments[:, 0], moments[:, 1:] = weights.sum(axis=1), weights @ self._gene_props.T
+        return self._fitness_from_moments_batch(self._rest_moments + moments, WEIGHT_PENALTY)
+
+    # MARK: Operator Genetik
+    def _swap_genes(self, population, rows, rng, swaps):
+        """Mutasi swap: `swaps` kali tukar dua gen acak pada setiap baris `rows` (in-place)."""
+        for _ in range(swaps):
+            i, j = rng.integers(0, population.shape[1], size=(2, len(rows)))
+            population[rows, i], population[rows, j] = population[rows, j], population[rows, i]
+
+    def _tournament(self, fitness, n, rng):
+        """Indeks n pemenang turnamen (fitness terkecil di antara tournament_size kandidat acak)."""
+        candidates = rng.integers(0, len(fitness), size=(n, self.tournament_size))
+        return candidates[np.arange(n), np.argmin(fitness[candidates], axis=1)]
+
+    def _order_crossover(self, parents1, parents2, rng):
+        """
+        Order crossover (OX1) per baris: segmen [a, b) dari induk 1, sisa posisi (mulai b, melingkar) diisi gen
+        induk 2 sesuai urutannya (mulai b) yang belum ada di segmen. Semua baris diproses sekaligus.
+        """
+        n_children, n = parents1.shape
+        cuts = np.sort(rng.integers(0, n + 1, size=(n_children, 2)), axis=1)
+        positions = np.arange(n)[None, :]
+        segment = (positions >= cuts[:, :1]) & (positions < cuts[:, 1:])
+        in_segment = np.zeros((n_children, n), dtype=bool)
+        np.put_along_axis(in_segment, parents1, segment, axis=1)
+        rolled = (positions + cuts[:, 1:]) % n
+        donor = np.take_along_axis(parents2, rolled, axis=1)
+        fill = ~np.take_along_axis(segment, rolled, axis=1)
+        children = np.where(segment, parents1, -1)
+        rows = np.repeat(np.arange(n_children), n - segment.sum(axis=1))
+        children[rows, rolled[fill]] = donor[~np.take_along_axis(in_segment, donor, axis=1)]
+        return children
+
+    def _next_generation(self, population, fitness, rng):
+        """Elit + anak hasil turnamen, OX (peluang crossover_rate) dan mutasi swap (peluang mutation_rate)."""
+        n_elite = min(self.elite, len(population))
+        n_children = len(population) - n_elite
+        parents1, parents2 = population[self._tournament(fitness, n_children, rng)], population[self._tournament(fitness, n_children, rng)]
+        children = parents1.copy()
+        crossed = np.flatnonzero(rng.random(n_children) < self.crossover_rate)
+        if len(crossed): children[crossed] = self._order_crossover(parents1[crossed], parents2[crossed], rng)
+        mutated = np.flatnonzero(rng.random(n_children) < self.mutation_rate)
+        if len(mutated): self._swap_genes(children, mutated, rng, self.mutation_swaps)
+        return np.vstack((population[np.argsort(fitness, kind='stable')[:n_elite]], children))
+
+    def _accept_generation(self, population, fitness, summaries, WEIGHT_PENALTY, TIERS):
+        best = int(np.argmin(fitness))
+        if fitness[best] < self.gbest_fitness:
+            self._update_gbest(self._genome_assignment(population[best], WEIGHT_PENALTY, TIERS), float(fitness[best]), summaries[best])
+
+    # MARK: Main
+    def run(self, MAX_ITERATIONS, TIERS, NUM_PARTICLES, WEIGHT_PENALTY, time_budget=None, stagnation_iterations=None,
+            stagnation_epsilon=0.0, warm_start=None, warm_start_swaps=3, polish=False, polish_time_budget=None):
+        """
+        Jalankan GA dengan signature yang sama seperti PSO_Stowage_Planner.run: MAX_ITERATIONS = jumlah generasi,
+        NUM_PARTICLES = ukuran populasi. time_budget / stagnation_iterations / warm_start / polish berperilaku sama.
+        """
+        if MAX_ITERATIONS is None and time_budget is None and stagnation_iterations is None:
+            raise ValueError("MAX_ITERATIONS=None membutuhkan time_budget atau stagnation_iterations.")
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        self.stop_reason, self.iterations_run = STOP_MAX_ITERATIONS, 0
+        self._start_convergence()
+        rng = np.random.default_rng(self.rng.getrandbits(63))
+
+        base_plan = self._initial_plan(TIERS, WEIGHT_PENALTY) if warm_start is None else self._warm_start_plan(warm_start, TIERS)
+        print("🧬 Menginisialisasi populasi...")
+        population = np.tile(self._setup_genome(base_plan), (NUM_PARTICLES, 1))
+        keep_base = warm_start is not None or self.initializer == INIT_BALANCED
+        self._swap_genes(population, np.arange(1 if keep_base else 0, NUM_PARTICLES), rng,
+                         self.init_swaps if warm_start is None else warm_start_swaps)
+        fitness, summaries = self._evaluate(population, WEIGHT_PENALTY, TIERS)
+        self._accept_generation(population, fitness, summaries, WEIGHT_PENALTY, TIERS)
+        last_improvement, reference_fitness = 0, self.gbest_fitness
+
+        print("\n--- Memulai Generasi GA ---")
+        for i in (range(MAX_ITERATIONS) if MAX_ITERATIONS is not None else itertools.count()):
+            population = self._next_generation(population, fitness, rng)
+            fitness, summaries = self._evaluate(population, WEIGHT_PENALTY, TIERS)
+            self._accept_generation(population, fitness, summaries, WEIGHT_PENALTY, TIERS)
+            self.iterations_run = i + 1
+            if (i + 1) % 10 == 0: print(f"Generasi {i+1}/{MAX_ITERATIONS or '-'} | Best Fitness: {self.gbest_fitness:.2f}")
+
+            # Kriteria berhenti anytime (sama seperti PSO)
+            if self.gbest_fitness < reference_fitness - stagnation_epsilon:
+                last_improvement, reference_fitness = i + 1, self.gbest_fitness
+            if stagnation_iterations is not None and i + 1 - last_improvement >= stagnation_iterations:
+                self.stop_reason = STOP_STAGNATION; break
+            if deadline is not None and time.perf_counter() >= deadline:
+                self.stop_reason = STOP_TIME_BUDGET; break
+        print(f"\n--- Optimasi Selesai ({self.stop_reason}, {self.iterations_run} generasi) ---")
+        if polish and self.gbest_assignment is not None: return self.polish(WEIGHT_PENALTY, time_budget=polish_time_budget, TIERS=TIERS)
+        self.gbest_position = self._decode_assignment(self.gbest_assignment) if self.gbest_assignment is not None else None
+        return self.gbest_position, self.gbest_summary
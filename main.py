@@ -1,6 +1,7 @@
 from formula import summarize_plan, get_containers, calculate_lcg, print_bestplan
-from pso_class import PSO_Stowage_Planner
-from ship_data import ship_data, datakondisikapal
+from ship_data import ship_data, load_ship_geometry, datakondisikapal
+from ship_geometry import ShipGeometry
+from stowage_engine import get_engine
 
 # Note:
 # Harus ada data container.xlsx di folder archive
@@ -8,7 +9,9 @@ from ship_data import ship_data, datakondisikapal
 # ===========================================================
 
 # MARK: Default Variable Value
-TOTAL_VALID_SLOTS_20FT, NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD, SLOT_PROPERTIES_20FT, VALID_SLOT_MASK_20FT, VALID_PLACEMENTS_40FT, SLOT_PROPERTIES_40FT, MAX_ITERATIONS, TIERS, NUM_PARTICLES, WEIGHT_PENALTY, BAYS, MAX_ROWS, tanks = ship_data()
+ENGINE = "pso"  # engine optimasi: "pso" atau "ga" (lihat stowage_engine.ENGINES)
+SHIP_GEOMETRY = load_ship_geometry()  # dimuat sekali: dipakai ship_data() dan ShipGeometry planner
+TOTAL_VALID_SLOTS_20FT, NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD, SLOT_PROPERTIES_20FT, VALID_SLOT_MASK_20FT, VALID_PLACEMENTS_40FT, SLOT_PROPERTIES_40FT, MAX_ITERATIONS, TIERS, NUM_PARTICLES, WEIGHT_PENALTY, BAYS, MAX_ROWS, tanks = ship_data(geometry=SHIP_GEOMETRY)
 
 all_containers = get_containers(TOTAL_VALID_SLOTS_20FT)
 if all_containers:
@@ -23,16 +26,20 @@ if all_containers:
         target_lcg_value = calculate_lcg()
 
         # Buat instance planner dan jalankan optimasi
-        stowage_planner = PSO_Stowage_Planner(
+        stowage_planner = get_engine(ENGINE)(
             NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD, all_containers=all_containers, lightship_data=lightship_properties, tanks_data=tanks_data,
             slot_properties_20ft=SLOT_PROPERTIES_20FT, valid_mask_20ft=VALID_SLOT_MASK_20FT,
             valid_placements_40ft=VALID_PLACEMENTS_40FT, slot_properties_40ft=SLOT_PROPERTIES_40FT,
-            target_lcg=target_lcg_value
+            target_lcg=target_lcg_value, geometry=ShipGeometry.from_compiled(SHIP_GEOMETRY)
         )
         best_plan, best_summary = stowage_planner.run(MAX_ITERATIONS, TIERS, NUM_PARTICLES, WEIGHT_PENALTY)
         
         # Tampilkan hasil ringkasan dan denah
         summarize_plan(best_summary, target_lcg_value)
         if best_plan is not None:
+            # File Excel ditulis di thread latar belakang selagi denah dicetak
+            export = stowage_planner.export_plan(best_plan, TIERS, BAYS, MAX_ROWS, "hasilstowageplan.xlsx", background=True)
             print_bestplan(best_plan, stowage_planner, BAYS, TIERS, MAX_ROWS, VALID_SLOT_MASK_20FT)
-            stowage_planner.export_plan_to_excel(best_plan, TIERS, BAYS, MAX_ROWS, "hasilstowageplan.xlsx")
\ No newline at end of file
+            export_path = export.result() if export is not None else None  # None: gagal (sudah dilaporkan) / kosong
+            if export_path is not None:
+                print(f"✅ Berhasil! Denah muatan telah disimpan sebagai '{export_path}'.")
\ No newline at end of file
@@ -0,0 +1,41 @@
+import hashlib
+import os
+import numpy as np
+
+from pathlib import Path
+
+CACHE_DIR = Path("export/cache")
+
+def file_sha256(file_path) -> str:
+    """Hash SHA-256 isi file (dibaca per blok 1 MB)."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_path_for(source_path, prefix: str, cache_dir=CACHE_DIR) -> Path:
+    """Path cache .npz dengan kunci hash isi `source_path`."""
+    return Path(cache_dir) / f"{prefix}_{file_sha256(source_path)[:32]}.npz"
+
+def load_npz(cache_path, version: int) -> dict | None:
+    """Muat cache .npz; None bila belum ada, rusak, atau versinya berbeda."""
+    cache_path = Path(cache_path)
+    if not cache_path.exists():
+        return None
+    try:
+        with np.load(cache_path, allow_pickle=False) as npz:
+            arrays = {k: npz[k] for k in npz.files}
+        return arrays if int(arrays["version"]) == version else None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Cache tidak valid ({cache_path}: {e}), membangun ulang...")
+        return None
+
+def save_npz_atomic(cache_path, arrays: dict):
+    """Tulis .npz ke file sementara lalu os.replace, sehingga pembaca tidak pernah melihat file setengah jadi."""
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, cache_path)
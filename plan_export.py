@@ -0,0 +1,163 @@
+import csv
+import itertools
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from stowage_engine import generate_order
+
+EXPORT_FORMATS = ("xlsx", "csv", "parquet", "edi")
+EXPORT_COLUMNS = [
+    'No.', 'Booking No.', 'Container ID', 'Bay', 'Row', 'Tier', 'Slot', 'Load Port', 'Discharge Port', 'Container ISO', 'F/E', 'Weight (VGM)',
+    'UN No.', 'DG Class', 'Group Type', 'Over Height', 'Over Size Left', 'Over Size Right', 'Over Size Front', 'Over Size Aft', 'Carrier', 'Commodity'
+]
+CONSTANT_COLUMNS = {'Load Port': 'IDJKT', 'Discharge Port': 'IDSUB', 'F/E': 'F'}  # kolom lain yang tidak dihitung dibiarkan kosong
+PLAN_FIELDS = ('Container ID', 'Bay', 'Row', 'Tier', 'Container ISO', 'Weight (VGM)')  # isi tuple plan_rows
+EXPORT_CHUNK = 4096  # sel denah yang dibaca sekaligus oleh plan_rows
+PARQUET_BATCH_ROWS = 65536
+
+# MARK: Baris
+def _two_digits(values):
+    return np.char.zfill(np.asarray(values).astype(str), 2)
+
+@lru_cache(maxsize=8)
+def _cell_order(shape, BAYS, TIERS, MAX_ROWS):
+    """
+    Urutan ekspor (Bay, Row, Tier) semua posisi kapal, dihitung sekali per geometri: setiap sel muncul dua kali,
+    sebagai slot 20ft dan sebagai kepala 40ft (ditulis dengan bay genap = bay kepala + 1).
+    Return (sel datar, is_40ft, label bay, label row, label tier), sejajar & terurut.
+    """
+    n = int(np.prod(shape))
+    t_idx, b_idx, r_idx = (np.tile(i, 2) for i in np.unravel_index(np.arange(n), shape))
+    cells, is_40ft = np.tile(np.arange(n), 2), np.repeat([False, True], n)
+    bay = _two_digits(np.asarray(BAYS)[b_idx] + is_40ft)
+    row = _two_digits(generate_order(MAX_ROWS))[r_idx]
+    tier = _two_digits(np.asarray(TIERS)[t_idx])
+    order = np.lexsort((tier, row, bay))
+    return cells[order], is_40ft[order], bay[order], row[order], tier[order]
+
+def plan_rows(engine, plan, TIERS, BAYS, MAX_ROWS):
+    """
+    Baris ekspor (lihat PLAN_FIELDS) satu per satu langsung dari grid denah, terurut Bay, Row, Tier seperti export lama.
+    Denah dibaca per blok EXPORT_CHUNK sel dalam urutan _cell_order, jadi memori tidak tumbuh dengan jumlah kontainer.
+    """
+    plan = np.asarray(plan)
+    flat = plan.reshape(-1)
+    cells, is_40ft, bay, row, tier = _cell_order(plan.shape, tuple(BAYS), tuple(TIERS), int(MAX_ROWS))
+    for start in range(0, len(cells), EXPORT_CHUNK):
+        block = slice(start, start + EXPORT_CHUNK)
+        ids = flat[cells[block]]
+        keep = np.flatnonzero(ids >= 0)
+        keep = keep[(engine.container_sizes[ids[keep]] == 40) == is_40ft[block][keep]]
+        ids = ids[keep]
+        yield from zip(engine.container_ids[ids].tolist(), bay[block][keep].tolist(), row[block][keep].tolist(),
+                       tier[block][keep].tolist(), np.where(is_40ft[block][keep], '45G1', '22G1').tolist(),
+                       (engine.container_weights[ids] / 1000).tolist())
+
+def _export_rows(rows):
+    """Baris plan_rows -> baris lengkap sesuai EXPORT_COLUMNS (Slot = Bay + Row + Tier; kolom konstan/kosong)."""
+    template = [CONSTANT_COLUMNS.get(name) for name in EXPORT_COLUMNS]
+    positions, slot = [EXPORT_COLUMNS.index(name) for name in PLAN_FIELDS], EXPORT_COLUMNS.index('Slot')
+    for values in rows:
+        row = list(template)
+        for k, value in zip(positions, values): row[k] = value
+        row[slot] = values[1] + values[2] + values[3]
+        yield row
+
+# MARK: Writer
+def _write_xlsx(path, rows):
+    workbook = Workbook(write_only=True)  # baris langsung di-stream ke file, memori konstan terhadap jumlah baris
+    sheet = workbook.create_sheet("Stowage Plan")
+    header = []
+    for name in EXPORT_COLUMNS:
+        cell = WriteOnlyCell(sheet, value=name)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+    for row in _export_rows(rows):
+        sheet.append(row)
+    workbook.save(path)
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        writer.writerows(_export_rows(rows))
+
+def _write_parquet(path, rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Ekspor Parquet membutuhkan paket pyarrow.") from e
+    schema = pa.schema([(name, pa.float64() if name == 'Weight (VGM)' else pa.string()) for name in EXPORT_COLUMNS])
+    rows = _export_rows(rows)
+    with pq.ParquetWriter(path, schema) as writer:  # ditulis per batch PARQUET_BATCH_ROWS baris
+        while batch := list(itertools.islice(rows, PARQUET_BATCH_ROWS)):
+            writer.write_table(pa.Table.from_arrays([pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)],
+                                                    schema=schema))
+
+def _write_edi(path, rows):
+    from baplie import baplie_segments  # impor lokal: baplie memakai plan_rows dari modul ini
+    with open(path, "w", encoding="ascii", errors="replace", newline="\n") as f:
+        f.writelines(segment + "\n" for segment in baplie_segments(rows))
+
+_WRITERS = {"xlsx": _write_xlsx, "csv": _write_csv, "parquet": _write_parquet, "edi": _write_edi}
+
+def write_rows(path, rows, fmt):
+    """Tulis baris plan_rows ke `path` secara atomik (file sementara lalu os.replace). Return path."""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        _WRITERS[fmt](tmp_path, rows)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists(): tmp_path.unlink()
+    return path
+
+def _write_reported(path, rows, fmt):
+    """write_rows dengan error dilaporkan (❌) alih-alih dilempar. Return path, atau None bila gagal."""
+    try:
+        return write_rows(path, rows, fmt)
+    except Exception as e:
+        print(f"❌ Gagal mengekspor ke {fmt}: {e}")
+        return None
+
+# MARK: Export
+def export_plan(engine, plan, TIERS, BAYS, MAX_ROWS, filename="stowage_plan.xlsx", export_dir="export", fmt=None, background=False):
+    """
+    Ekspor denah ke export_dir/<filename> dalam format xlsx, csv, parquet, atau edi (BAPLIE) (default: dari ekstensi filename).
+    Baris di-stream dari array denah (plan_rows). background=True menulis file di thread terpisah dan langsung
+    mengembalikan Future (result() = path, atau None bila gagal); tanpa background, return path atau None bila gagal/kosong.
+    Error penulisan tidak pernah dilempar: keduanya mencetak "❌ Gagal mengekspor" dan menghasilkan None.
+    """
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    out_path = export_dir / Path(filename).name  # pakai nama file saja (tanpa path) di dalam export_dir
+    fmt = (fmt or out_path.suffix.lstrip(".") or "xlsx").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format ekspor tidak dikenal: {fmt} (pilihan: {', '.join(EXPORT_FORMATS)})")
+    if out_path.suffix.lower() != f".{fmt}": out_path = out_path.with_suffix(f".{fmt}")
+
+    print(f"\n⚙️ Mengekspor denah ke file {fmt}: {out_path}...")
+    plan = np.array(plan) if background else np.asarray(plan)  # salinan: aman bila denah diubah selagi thread menulis
+    if not (plan >= 0).any():
+        print("⚠️ Tidak ada kontainer untuk diekspor.")
+        return None
+    rows = plan_rows(engine, plan, TIERS, BAYS, MAX_ROWS)
+    if background:
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plan-export")
+        future = executor.submit(_write_reported, out_path, rows, fmt)
+        executor.shutdown(wait=False)
+        return future
+    if _write_reported(out_path, rows, fmt) is None:
+        return None
+    print(f"✅ Berhasil! Denah muatan telah disimpan sebagai '{out_path}'.")
+    return out_path
@@ -0,0 +1,142 @@
+import html
+
+from pathlib import Path
+
+import numpy as np
+
+from stowage_engine import EMPTY_SLOT, generate_order
+
+CELL_WIDTH = 12
+RENDER_FORMATS = ("text", "html", "svg")
+SVG_CELL = (64, 22)  # lebar, tinggi satu slot 20ft (px)
+SVG_MARGIN = (56, 24)  # kolom label row, baris header bay
+SVG_COLORS = {20: "#9ecae1", 40: "#fdae6b", "empty": "#ffffff", "stroke": "#9e9e9e"}
+
+# Denah per tier dirender dari grid numerik (lihat stowage_engine: EMPTY_SLOT, OCCUPIED_40FT untuk ekor 40ft).
+# Header bay, label row dan string sel dihitung sekali; setiap tier hanya menggabungkan string sel ke satu buffer.
+
+# MARK: Tata Letak
+def _select(values, selected, pair=False):
+    """Indeks nilai yang dipilih (semua bila selected None); pair=True: label bay 40ft (genap) memilih kedua bay 20ft-nya."""
+    if selected is None: return np.arange(len(values))
+    selected = set(selected)
+    return np.array([i for i, v in enumerate(values) if v in selected or (pair and (v + 1 in selected or v - 1 in selected))], dtype=np.int64)
+
+def _bay_groups(BAYS, bay_idx):
+    """Kolom header: dua bay 20ft berurutan (b, b+2) digabung menjadi satu bay 40ft berlabel b+1."""
+    groups, i = [], 0
+    while i < len(bay_idx):
+        bay_id = BAYS[bay_idx[i]]
+        if i + 1 < len(bay_idx) and BAYS[bay_idx[i + 1]] == bay_id + 2:
+            groups.append((f"Bay{bay_id + 1:02d} (40ft)", 2)); i += 2
+        else:
+            groups.append((f"Bay{bay_id:02d}", 1)); i += 1
+    return groups
+
+def _text_cells(engine, plan, valid_mask, bay_idx, width):
+    """
+    Kode sel (tier, bay terpilih, row) ke tabel string selebar `width` yang dibangun sekali per kontainer:
+    [ID (40ft: paruh kiri) | paruh kanan 40ft | ID utuh | "." | kosong]. ID 40ft ditulis di tengah sel kepala
+    + sel ekor; bila bay ekor tidak dipilih, ID utuh ditulis di sel kepala.
+    """
+    ids = [str(cid) for cid in engine.container_ids.tolist()]
+    n, is_40ft = len(ids), (engine.container_sizes == 40).tolist()
+    halves = [cid.center(width * 2) if big and len(cid) <= width * 2 else None for cid, big in zip(ids, is_40ft)]
+    table = ([h[:width] if h else cid.ljust(width) for cid, h in zip(ids, halves)]
+             + [h[width:] if h else "" for h in halves] + [cid.ljust(width) for cid in ids] + [".".ljust(width), " " * width])
+    plan, valid = plan[:, bay_idx, :], valid_mask[:, bay_idx, :]
+    codes = np.where(plan >= 0, plan, np.where(valid, 3 * n, 3 * n + 1))
+    t, k, r = np.nonzero((plan >= 0) & (engine.container_sizes[np.maximum(plan, 0)] == 40))
+    paired = (k + 1 < len(bay_idx)) & (bay_idx[np.minimum(k + 1, len(bay_idx) - 1)] == bay_idx[k] + 1)
+    codes[t[paired], k[paired] + 1, r[paired]] = n + plan[t[paired], k[paired], r[paired]]
+    codes[t[~paired], k[~paired], r[~paired]] += 2 * n
+    return codes, table
+
+def _visible_tiers(plan, TIERS, tier_idx, bay_idx):
+    """(t_idx, tier_id) tier terpilih yang berisi muatan pada bay terpilih, dari atas ke bawah."""
+    occupied = (plan[np.ix_(tier_idx, bay_idx)] != EMPTY_SLOT).any(axis=(1, 2))
+    return sorted(((int(t), TIERS[t]) for t, o in zip(tier_idx, occupied) if o), key=lambda x: x[1], reverse=True)
+
+# MARK: Teks
+def _render_text(engine, plan, BAYS, TIERS, MAX_ROWS, valid_mask, tier_idx, bay_idx, width):
+    codes, table = _text_cells(engine, plan, valid_mask, bay_idx, width)
+    header = "Row".ljust(width) + "".join(label.center(width * 2) if span == 2 else label.ljust(width)
+                                          for label, span in _bay_groups(BAYS, bay_idx))
+    row_labels = [f"Row {label:02d}".ljust(width) for label in generate_order(int(MAX_ROWS))]
+    lines = []
+    for t_idx, tier_id in _visible_tiers(plan, TIERS, tier_idx, bay_idx):
+        lines += ["", "", f"--- Denah untuk Tier {tier_id:02d} ---", header, "-" * len(header)]
+        tier_codes = codes[t_idx].T.tolist()
+        occupied = (plan[t_idx][bay_idx] != EMPTY_SLOT).any(axis=0)
+        lines += [row_labels[r] + "".join([table[c] for c in tier_codes[r]]) for r in np.flatnonzero(occupied).tolist()]
+    return "\n".join(lines)
+
+# MARK: HTML/SVG
+def _svg_tier(engine, plan, BAYS, t_idx, valid_mask, bay_idx, row_labels, y=0):
+    """Satu <svg> untuk tier: slot valid sebagai kotak, 20ft/40ft berwarna dengan ID & tooltip berat (ton)."""
+    (cw, ch), (mx, my) = SVG_CELL, SVG_MARGIN
+    column = {int(b): k for k, b in enumerate(bay_idx)}
+    rows = np.flatnonzero(valid_mask[t_idx][bay_idx].any(axis=0))
+    width, height = mx + cw * len(bay_idx), my + ch * len(rows) + 4
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" y="{y}" width="{width}" height="{height}" font-family="monospace" font-size="10">']
+    x = mx
+    for label, span in _bay_groups(BAYS, bay_idx):
+        parts.append(f'<text x="{x + cw * span / 2}" y="{my - 8}" text-anchor="middle">{label}</text>')
+        x += cw * span
+    for k, r in enumerate(rows.tolist()):
+        ry = my + ch * k
+        parts.append(f'<text x="4" y="{ry + ch * 0.7}">Row {row_labels[r]:02d}</text>')
+        for b in bay_idx.tolist():
+            if not valid_mask[t_idx, b, r] and plan[t_idx, b, r] < 0: continue
+            value, rx = int(plan[t_idx, b, r]), mx + cw * column[b]
+            if value < 0:
+                if value == EMPTY_SLOT:
+                    parts.append(f'<rect x="{rx}" y="{ry}" width="{cw}" height="{ch}" fill="{SVG_COLORS["empty"]}" stroke="{SVG_COLORS["stroke"]}"/>')
+                continue  # ekor 40ft sudah digambar oleh kepalanya
+            size = int(engine.container_sizes[value])
+            span = 2 if size == 40 and b + 1 in column else 1
+            cid = html.escape(str(engine.container_ids[value]))
+            parts.append(f'<g><title>{cid} ({size}ft, {engine.container_weights[value] / 1000:.1f} t)</title>'
+                         f'<rect x="{rx}" y="{ry}" width="{cw * span}" height="{ch}" fill="{SVG_COLORS[size]}" stroke="{SVG_COLORS["stroke"]}"/>'
+                         f'<text x="{rx + cw * span / 2}" y="{ry + ch * 0.7}" text-anchor="middle">{cid}</text></g>')
+    parts.append("</svg>")
+    return parts, width, height
+
+def _render_markup(engine, plan, BAYS, TIERS, MAX_ROWS, valid_mask, tier_idx, bay_idx, fmt):
+    row_labels = generate_order(int(MAX_ROWS))
+    tiers, y, width, body = _visible_tiers(plan, TIERS, tier_idx, bay_idx), 0, 0, []
+    for t_idx, tier_id in tiers:
+        parts, w, h = _svg_tier(engine, plan, BAYS, t_idx, valid_mask, bay_idx, row_labels, y=y + 20 if fmt == "svg" else 0)
+        if fmt == "svg":
+            body.append(f'<text x="0" y="{y + 14}" font-family="sans-serif" font-size="13" font-weight="bold">Tier {tier_id:02d}</text>')
+        else:
+            body.append(f"<h2>Tier {tier_id:02d}</h2>")
+        body += parts
+        y, width = y + h + 20, max(width, w)
+    if fmt == "svg":
+        return "\n".join([f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{y}">'] + body + ["</svg>"])
+    return "\n".join(['<!DOCTYPE html>', '<html><head><meta charset="utf-8"><title>Denah Muatan</title>',
+                      '<style>body{font-family:sans-serif} h2{font-size:14px;margin:16px 0 4px}</style></head><body>',
+                      '<h1>Denah Muatan per Tier</h1>'] + body + ['</body></html>'])
+
+# MARK: Render
+def render_tier_map(engine, plan, BAYS, TIERS, MAX_ROWS, valid_mask, tiers=None, bays=None, fmt="text", cell_width=CELL_WIDTH):
+    """
+    Denah per tier (atas ke bawah) sebagai satu string: teks seperti print_bestplan, dokumen HTML, atau SVG.
+    tiers / bays membatasi tier dan bay yang dirender (label kapal, mis. tiers=[82, 84], bays=[1, 3] atau [2]).
+    """
+    if fmt not in RENDER_FORMATS:
+        raise ValueError(f"Format denah tidak dikenal: {fmt} (pilihan: {', '.join(RENDER_FORMATS)})")
+    BAYS, TIERS = list(BAYS), list(TIERS)
+    plan, valid_mask = np.asarray(plan), np.asarray(valid_mask, dtype=bool)
+    tier_idx, bay_idx = _select(TIERS, tiers), _select(BAYS, bays, pair=True)
+    if fmt == "text":
+        return _render_text(engine, plan, BAYS, TIERS, MAX_ROWS, valid_mask, tier_idx, bay_idx, cell_width)
+    return _render_markup(engine, plan, BAYS, TIERS, MAX_ROWS, valid_mask, tier_idx, bay_idx, fmt)
+
+def write_tier_map(path, engine, plan, BAYS, TIERS, MAX_ROWS, valid_mask, tiers=None, bays=None, fmt=None):
+    """Tulis denah ke file; format default dari ekstensi (.html, .svg, selain itu teks). Return path."""
+    path = Path(path)
+    fmt = fmt or {".html": "html", ".htm": "html", ".svg": "svg"}.get(path.suffix.lower(), "text")
+    path.write_text(render_tier_map(engine, plan, BAYS, TIERS, MAX_ROWS, valid_mask, tiers=tiers, bays=bays, fmt=fmt) + "\n", encoding="utf-8")
+    return path
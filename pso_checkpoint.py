@@ -0,0 +1,86 @@
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+from npz_cache import load_npz, save_npz_atomic
+
+CHECKPOINT_VERSION = 1
+
+# MARK: Fingerprint
+def problem_fingerprint(planner, WEIGHT_PENALTY):
+    """Hash data masalah (kontainer, geometri, target, penalti, aturan update); checkpoint hanya boleh dilanjutkan pada masalah yang sama."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\0".join(map(str, planner.container_ids.tolist())).encode())
+    for arr in (planner.container_weights, planner._mask_20ft, planner._mask_40ft, planner._props_20ft, planner._props_40ft,
+                np.asarray(planner.position_shape, dtype=np.int64)):
+        digest.update(np.ascontiguousarray(arr).tobytes())
+    digest.update(json.dumps([planner.target_lcg, WEIGHT_PENALTY, planner.update_rule, planner.inertia, planner.cognitive,
+                              planner.social, planner.max_velocity], sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+# MARK: Save
+def save_checkpoint(planner, path, WEIGHT_PENALTY, next_iteration, last_improvement, reference_fitness, stop_reason=None):
+    """
+    Tulis seluruh state swarm (.npz) secara atomik: matriks posisi/momen/pbest, kecepatan, gbest,
+    state RNG planner, seed basis evaluator paralel, penanda posisi kanonik & kontainer terkunci (warm start), dan penanda kriteria berhenti.
+    """
+    version, mt_state, gauss_next = planner.rng.getstate()
+    velocities = [particle['velocity'] for particle in planner.swarm]
+    moves = [move for velocity in velocities for move in velocity]
+    save_npz_atomic(path, {
+        "version": np.array(CHECKPOINT_VERSION),
+        "fingerprint": np.array(problem_fingerprint(planner, WEIGHT_PENALTY)),
+        "positions": planner._positions, "moments": planner._moments,
+        "pbest_positions": planner._pbest_positions, "pbest_moments": planner._pbest_moments,
+        "pbest_fitness": np.array([particle['pbest_fitness'] for particle in planner.swarm], dtype=np.float64),
+        "velocity_lengths": np.array([len(v) for v in velocities], dtype=np.int64),
+        "velocity_moves": np.array(moves, dtype=np.int64).reshape(-1, 2),
+        "gbest_assignment": planner.gbest_assignment if planner.gbest_assignment is not None else np.empty(0, dtype=np.int32),
+        "gbest_fitness": np.array(planner.gbest_fitness),
+        "gbest_summary": np.array(json.dumps(planner.gbest_summary)),
+        "rng_version": np.array(version), "rng_state": np.array(mt_state, dtype=np.uint64),
+        "rng_gauss_next": np.array(math.nan if gauss_next is None else gauss_next),
+        "parallel_base_seed": np.array(-1 if planner._parallel_base_seed is None else planner._parallel_base_seed, dtype=np.int64),
+        "canonical_positions": np.array(planner._canonical_positions), "pinned_slots": planner._pinned_slots,
+        "next_iteration": np.array(next_iteration), "last_improvement": np.array(last_improvement),
+        "reference_fitness": np.array(reference_fitness), "stop_reason": np.array(stop_reason or ""),
+    })
+
+# MARK: Resume
+def load_checkpoint(planner, path, NUM_PARTICLES, WEIGHT_PENALTY):
+    """
+    Pulihkan state swarm dari checkpoint ke `planner`. Return dict (next_iteration, last_improvement,
+    reference_fitness, stop_reason), atau None bila file belum ada. ValueError bila checkpoint rusak
+    atau berasal dari masalah / jumlah partikel lain.
+    """
+    if not os.path.exists(path):
+        return None
+    state = load_npz(path, CHECKPOINT_VERSION)
+    if state is None:
+        raise ValueError(f"Checkpoint tidak valid: {path}")
+    if str(state["fingerprint"]) != problem_fingerprint(planner, WEIGHT_PENALTY):
+        raise ValueError(f"Checkpoint {path} berasal dari data kontainer/kapal/parameter yang berbeda.")
+    if len(state["positions"]) != NUM_PARTICLES:
+        raise ValueError(f"Checkpoint {path} berisi {len(state['positions'])} partikel, bukan {NUM_PARTICLES}.")
+
+    planner._positions, planner._moments = state["positions"].copy(), state["moments"].copy()
+    planner._pbest_positions, planner._pbest_moments = state["pbest_positions"].copy(), state["pbest_moments"].copy()
+    offsets = np.concatenate(([0], np.cumsum(state["velocity_lengths"])))
+    moves = [tuple(m) for m in state["velocity_moves"].tolist()]
+    planner.swarm = [{'position': planner._positions[k], 'moments': planner._moments[k], 'velocity': moves[offsets[k]:offsets[k + 1]],
+                      'pbest_position': planner._pbest_positions[k], 'pbest_fitness': float(state["pbest_fitness"][k]),
+                      'pbest_moments': planner._pbest_moments[k]} for k in range(NUM_PARTICLES)]
+    planner.gbest_assignment = state["gbest_assignment"].copy() if state["gbest_assignment"].size else None
+    planner.gbest_fitness, planner.gbest_summary = float(state["gbest_fitness"]), json.loads(str(state["gbest_summary"]))
+
+    gauss_next = float(state["rng_gauss_next"])
+    planner.rng.setstate((int(state["rng_version"]), tuple(int(x) for x in state["rng_state"]), None if math.isnan(gauss_next) else gauss_next))
+    base_seed = int(state["parallel_base_seed"])
+    planner._parallel_base_seed = None if base_seed < 0 else base_seed
+    planner._canonical_positions = bool(state["canonical_positions"]) if "canonical_positions" in state else True
+    planner._set_pinned(state["pinned_slots"].copy() if "pinned_slots" in state else None)
+    return {"next_iteration": int(state["next_iteration"]), "last_improvement": int(state["last_improvement"]),
+            "reference_fitness": float(state["reference_fitness"]), "stop_reason": str(state["stop_reason"]) or None}
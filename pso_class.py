@@ -1,289 +1,343 @@
-from collections import defaultdict
-from openpyxl.styles import Font
+import itertools
+import time
 
 import numpy as np
-import pandas as pd
-import copy
-import random
 
-class PSO_Stowage_Planner:
+from pso_checkpoint import load_checkpoint, save_checkpoint
+from pso_stats import NULL_STATS, RunStats
+# Konstanta & helper di bawah diekspor ulang agar import lama dari pso_class tetap berlaku
+from stowage_engine import (EMPTY_SLOT, OCCUPIED_40FT, STOP_MAX_ITERATIONS, STOP_TIME_BUDGET, STOP_STAGNATION,
+                            INIT_VCG, INIT_BALANCED, StowageEngine, generate_order, value_by_indexed_order)
+
+__all__ = ["EMPTY_SLOT", "OCCUPIED_40FT", "STOP_MAX_ITERATIONS", "STOP_TIME_BUDGET", "STOP_STAGNATION", "INIT_VCG",
+           "INIT_BALANCED", "StowageEngine", "generate_order", "value_by_indexed_order",
+           "UPDATE_RANDOM_WALK", "UPDATE_VELOCITY", "PSO_Stowage_Planner"]
+
+# Aturan update posisi partikel (lihat _update_particle_position)
+UPDATE_RANDOM_WALK, UPDATE_VELOCITY = "random_walk", "velocity"
+
+class PSO_Stowage_Planner(StowageEngine):
     """Kelas utama untuk menjalankan algoritma PSO untuk Stowage Planning."""
+    KERNEL_SCALARS = StowageEngine.KERNEL_SCALARS + ('update_rule', 'inertia', 'cognitive', 'social', 'max_velocity')
+
     def __init__(self, NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD, 
                     all_containers, lightship_data, tanks_data, 
                     slot_properties_20ft, valid_mask_20ft, 
-                    valid_placements_40ft, slot_properties_40ft, target_lcg):
-        
-        self.lightship_weight, self.lightship_lcg, self.lightship_vcg, self.lightship_tcg = lightship_data.values()
-        self.tanks_data, self.slot_properties_20ft, self.valid_mask = tanks_data, slot_properties_20ft, valid_mask_20ft
-        self.valid_slots_coords_20ft, self.valid_placements_40ft = list(slot_properties_20ft.keys()), valid_placements_40ft
-        self.slot_properties_40ft, self.position_shape, self.target_lcg = slot_properties_40ft, valid_mask_20ft.shape, target_lcg
-        self.gbest_fitness, self.gbest_position, self.gbest_summary, self.swarm = float('inf'), None, {}, []
+                    valid_placements_40ft, slot_properties_40ft, target_lcg, consistency_check=False, seed=None,
+                    safe_slot_cache_size=256, update_rule=UPDATE_VELOCITY, inertia=0.3, cognitive=1.0, social=0.5,
+                    max_velocity=None, initializer=INIT_BALANCED, exact_20ft=False, geometry=None):
+        if update_rule not in (UPDATE_RANDOM_WALK, UPDATE_VELOCITY): raise ValueError(f"update_rule tidak dikenal: {update_rule}")
+        # PSO diskrit: koefisien inersia / kognitif / sosial dan batas panjang kecepatan (jumlah langkah)
+        self.update_rule, self.inertia, self.cognitive, self.social = update_rule, inertia, cognitive, social
+        self.max_velocity = max_velocity
+        self.swarm = []
+        self._parallel_base_seed = None  # seed basis ParallelSwarmEvaluator (disimpan di checkpoint)
+        super().__init__(NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD, all_containers, lightship_data, tanks_data,
+                         slot_properties_20ft, valid_mask_20ft, valid_placements_40ft, slot_properties_40ft, target_lcg,
+                         consistency_check=consistency_check, seed=seed, safe_slot_cache_size=safe_slot_cache_size,
+                         initializer=initializer, exact_20ft=exact_20ft, geometry=geometry)
 
-        print("🔍 Memisahkan kontainer berdasarkan ukuran...")
-        containers_20ft = sorted([c for c in all_containers if c['size'] == 20], key=lambda x: x['weight'], reverse=True)
-        containers_40ft = sorted([c for c in all_containers if c['size'] == 40], key=lambda x: x['weight'], reverse=True)
-        self.containers_to_load_20ft, self.containers_to_load_40ft = containers_20ft[:NUM_20FT_TO_LOAD], containers_40ft[:NUM_40FT_TO_LOAD]
-        self.container_dict = {c['id']: c for c in self.containers_to_load_20ft + self.containers_to_load_40ft}
-        print(f"   - {len(self.containers_to_load_20ft)} kontainer 20ft dan {len(self.containers_to_load_40ft)} kontainer 40ft akan dimuat.")
+    @classmethod
+    def _from_kernel_state(cls, arrays, scalars, seed=None):
+        planner = super()._from_kernel_state(arrays, scalars, seed)
+        planner.swarm = []
+        return planner
 
-    # MARK: Base Plan
-    def _create_base_plan(self, TIERS):
-        """Membangun denah dasar yang dari awal sudah mematuhi semua aturan constraint, termasuk aturan On Deck."""
-        print("🏗️  Membuat denah dasar yang valid (dengan aturan On Deck)...")
-        base_position = np.zeros(self.position_shape, dtype=object)
+    # MARK: Swarm
+    def _initialize_swarm(self, base_plan, NUM_PARTICLES, TIERS, WEIGHT_PENALTY, init_swaps=25, keep_base=False, pinned_slots=None):
+        """
+        Swarm = base_plan + init_swaps swap acak per partikel (keep_base: partikel pertama = base_plan persis).
+        pinned_slots (warm start, lihat _set_pinned): kontainer yang dikunci tidak ikut swap, dan partikel hanya
+        diendapkan ulang untuk kontainer yang di-swap (_repair_moved) alih-alih repair penuh.
+        """
+        print("🚀 Menginisialisasi partikel...")
+        # Seluruh swarm disimpan sebagai matriks (partikel, kontainer); data per partikel adalah view baris
+        stats = self.stats
+        self._set_pinned(pinned_slots)
+        self._positions = np.tile(self._encode_plan(base_plan), (NUM_PARTICLES, 1))
+        for position in self._positions[1 if keep_base else 0:]:
+            moved = None if pinned_slots is None else set()
+            with stats.phase('init_swap'):
+                for _ in range(init_swaps):
+                    position = self._safe_swap(position, moved=moved)
+            with stats.phase('init_repair'):
+                if self.exact_20ft: self._solve_20ft(position, self._assignment_moments(position), WEIGHT_PENALTY, TIERS)
+                elif moved is None: position[:] = self._repair_assignment(position, TIERS)
+                else: self._repair_moved(position, moved)
+        stats.count('swaps', init_swaps * NUM_PARTICLES); stats.count('full_repairs' if pinned_slots is None else 'repairs', NUM_PARTICLES)
+        with stats.phase('init_fitness'):
+            self._pbest_positions = self._positions.copy()
+            self._pbest_moments = self._batch_moments(self._pbest_positions)
+            self._moments = self._pbest_moments.copy()  # momen posisi terkini (dipakai update kecepatan)
+            fitness, summaries = self._fitness_from_moments_batch(self._pbest_moments, WEIGHT_PENALTY)
+        stats.count('evaluations', NUM_PARTICLES)
+        with stats.phase('bookkeeping'):
+            self.swarm = [{'position': self._positions[k], 'moments': self._moments[k], 'velocity': [],
+                           'pbest_position': self._pbest_positions[k], 'pbest_fitness': float(fitness[k]),
+                           'pbest_moments': self._pbest_moments[k]} for k in range(NUM_PARTICLES)]
+            if NUM_PARTICLES and fitness.min() < self.gbest_fitness:
+                best = int(np.argmin(fitness))
+                self._update_gbest(self._positions[best], float(fitness[best]), summaries[best])
+                stats.count('gbest_improvements')
+        print("Inisialisasi selesai.")
 
-        # 1. Tempatkan semua kontainer 40ft
-        slots_40ft_sorted = sorted(self.valid_placements_40ft, key=lambda c: self.slot_properties_40ft[c]['vcg'])
-        for i in range(min(len(self.containers_to_load_40ft), len(slots_40ft_sorted))):
-            container, coords = self.containers_to_load_40ft[i], slots_40ft_sorted[i]
-            t_idx, b_idx, r_idx = coords
-            base_position[t_idx, b_idx, r_idx], base_position[t_idx, b_idx + 1, r_idx] = container['id'], 'OCCUPIED_40FT'
+    # MARK: Repair Inkremental
+    def _repair_moved(self, assignment, moved, moments=None):
+        """
+        Repair inkremental (in-place): hanya kontainer 20ft di `moved` yang diendapkan kembali di antara
+        slot yang sedang mereka tempati (terurut VCG). Swap ukuran-sama tidak mengubah okupansi 40ft, jadi
+        plafon & daftar slot aman tetap; hasilnya identik dengan _repair_assignment selama posisi awal
+        adalah hasil repair dan hanya diubah lewat _safe_swap.
+        """
+        ids = np.fromiter(moved, dtype=np.int64, count=len(moved))
+        ids = ids[~self._is_40ft[ids]]  # 40ft tetap terkunci
+        slots = assignment[ids]
+        target_slots = slots[np.argsort(self._vcg_rank_20ft[slots], kind='stable')]
+        sorted_ids = self._sort_20ft_ids(ids)
+        changed = assignment[sorted_ids] != target_slots
+        if moments is not None: moments -= self._assignment_moments(assignment, sorted_ids[changed])
+        assignment[sorted_ids] = target_slots
+        if moments is not None: moments += self._assignment_moments(assignment, sorted_ids[changed])
+        return assignment
 
-        # 2. Setelah 40ft ditempatkan, tentukan semua "plafon" di Under Deck
-        ceilings = {}
-        for b_idx in range(self.position_shape[1]):
-            for r_idx in range(self.position_shape[2]):
-                max_tier = -1
-                for t_idx in range(self.position_shape[0]):
-                    if base_position[t_idx, b_idx, r_idx] != 0:
-                        max_tier = max(max_tier, t_idx)
-                if max_tier != -1:
-                    ceilings[(b_idx, r_idx)] = max_tier
-        
-        # 3. Cari semua slot 20ft yang aman dengan aturan On Deck/Under Deck
-        safe_20ft_slots = []
-        for coords in self.valid_slots_coords_20ft:
-            t_idx, b_idx, r_idx = coords
-            tier_id = TIERS[t_idx]
-            
-            # Lewati jika slot sudah terisi
-            if base_position[coords] != 0:
-                continue
+    # MARK: Update Partikel
+    def _safe_swap(self, assignment, moments=None, moved=None):
+        """
+        Tukar slot dua kontainer berukuran sama. Jika `moments` diberikan, momen kargo diperbarui in-place dalam O(1);
+        jika `moved` (set) diberikan, indeks kedua kontainer ditambahkan ke dalamnya.
+        """
+        ids = self._ids_20ft if self.rng.random() < 0.5 else self._ids_40ft
+        placed = ids[(assignment[ids] >= 0) & self._movable[ids]]
+        if len(placed) >= 2:
+            i1, i2 = self.rng.sample(range(len(placed)), 2); id1, id2 = placed[i1], placed[i2]
+            if moments is not None: moments += self._swap_moment_delta(id1, id2, assignment[id1], assignment[id2])
+            if moved is not None: moved.update((id1, id2))
+            assignment[id1], assignment[id2] = assignment[id2], assignment[id1]
+        return assignment
 
-            is_safe = False
-            # Cek apakah slot berada di Under Deck atau On Deck
-            if tier_id < 82: # UNDER DECK
-                ceiling = ceilings.get((b_idx, r_idx), -1)
-                if ceiling == -1 or t_idx < ceiling:
-                    is_safe = True
-            else: # ON DECK
-                is_safe = True # Aturan plafon tidak berlaku di On Deck
-            
-            if is_safe:
-                safe_20ft_slots.append(coords)
-        
-        safe_20ft_slots.sort(key=lambda c: self.slot_properties_20ft[c]['vcg'])
+    def _update_particle_position(self, particle):
+        """Update posisi partikel sesuai self.update_rule. Return (posisi, momen, kontainer yang dipindah)."""
+        if self.update_rule == UPDATE_VELOCITY: return self._velocity_update(particle)
+        return self._random_walk_update(particle)
 
-        # 4. Isi slot-slot aman tersebut dengan kontainer 20ft
-        for i, cid_data in enumerate(self.containers_to_load_20ft):
-            if i < len(safe_20ft_slots):
-                base_position[safe_20ft_slots[i]] = cid_data['id']
-            else:
-                break
-        
-        return self._repair_plan(base_position, TIERS)
+    def _random_walk_update(self, particle):
+        """Perilaku lama: salin pbest ke buffer posisi partikel lalu lakukan 5 swap; momen & kontainer yang dipindah ikut dicatat."""
+        stats = self.stats
+        with stats.phase('copy'):
+            position, moments, moved = particle['position'], particle['pbest_moments'].copy(), set()
+            np.copyto(position, particle['pbest_position'])
+        with stats.phase('swap'):
+            for _ in range(5):
+                position = self._safe_swap(position, moments, moved)
+        stats.count('swaps', 5)
+        return position, moments, moved
 
+    # MARK: Swap-Sequence Velocity
+    # Kecepatan partikel = daftar langkah (kontainer, slot tujuan). Menerapkan langkah = menukar kontainer tersebut
+    # dengan penghuni slot tujuan (harus berukuran sama). Berbeda dengan swap pasangan, langkah yang sama
+    # bila diterapkan lagi tidak membatalkan dirinya sendiri, sehingga inersia berarti "pertahankan arah".
+    def _occupants(self, assignment):
+        """Indeks datar slot -> indeks kontainer penghuninya (-1 bila tidak ada kepala kontainer di slot itu)."""
+        occupant = np.full(self._mask_20ft.shape[0], EMPTY_SLOT, dtype=np.int64)
+        placed = np.flatnonzero(assignment >= 0)
+        occupant[assignment[placed]] = placed
+        return occupant
 
-    def _initialize_swarm(self, base_plan, NUM_PARTICLES, TIERS, WEIGHT_PENALTY):
-        print("🚀 Menginisialisasi partikel...")
-        for _ in range(NUM_PARTICLES):
-            position = copy.deepcopy(base_plan)
-            for _ in range(25):
-                position = self._safe_swap(position)
-            position = self._repair_plan(position, TIERS)
-            fitness, summary = self._calculate_fitness(position, WEIGHT_PENALTY)
-            particle = {'position': position, 'pbest_position': copy.deepcopy(position), 'pbest_fitness': fitness}
-            self.swarm.append(particle)
-            if fitness < self.gbest_fitness:
-                self.gbest_fitness, self.gbest_position, self.gbest_summary = fitness, copy.deepcopy(position), summary
-        print("Inisialisasi selesai.")
+    def _apply_move(self, assignment, occupant, container, slot, moments, moved):
+        """Pindahkan `container` ke `slot` dengan menukar penghuninya (ukuran sama). Return True bila posisi berubah."""
+        current, other = int(assignment[container]), int(occupant[slot])
+        if current == slot or current < 0 or other < 0 or self._is_40ft[other] != self._is_40ft[container]:
+            return False
+        moments += self._swap_moment_delta(container, other, current, slot)
+        assignment[container], assignment[other] = slot, current
+        occupant[slot], occupant[current] = container, other
+        moved.update((container, other))
+        return True
 
-    # MARK: Repair Plan
-    # --- FUNGSI PERBAIKAN DENGAN ATURAN ON DECK BARU ---
-    def _repair_plan(self, plan, TIERS):
-        repaired_plan = np.zeros(self.position_shape, dtype=object)
-        
-        # 1. Kunci semua posisi 40ft
-        containers_40ft = []
-        for coords, cid in np.ndenumerate(plan):
-            if cid != 0 and cid != 'OCCUPIED_40FT' and self.container_dict.get(cid) and self.container_dict[cid]['size'] == 40:
-                repaired_plan[coords] = cid
-                repaired_plan[coords[0], coords[1]+1, coords[2]] = 'OCCUPIED_40FT'
-                containers_40ft.append(cid)
-        
-        # 2. Tentukan semua "plafon"
-        ceilings = {}
-        for b_idx in range(self.position_shape[1]):
-            for r_idx in range(self.position_shape[2]):
-                max_tier = -1
-                for t_idx in range(self.position_shape[0]):
-                    if repaired_plan[t_idx, b_idx, r_idx] != 0:
-                        max_tier = max(max_tier, t_idx)
-                if max_tier != -1:
-                    ceilings[(b_idx, r_idx)] = max_tier
-        
-        # 3. Kumpulkan & urutkan SEMUA kontainer 20ft
-        all_20ft_containers = [cid for cid in np.ravel(plan) if cid != 0 and cid != 'OCCUPIED_40FT' and self.container_dict.get(cid) and self.container_dict[cid]['size'] == 20]
-        sorted_20ft_ids = sorted(all_20ft_containers, key=lambda cid: self.container_dict[cid]['weight'], reverse=True)
+    def _moves_toward(self, assignment, target):
+        """Selisih (target - posisi) sebagai langkah (kontainer, slot tujuan) untuk kontainer yang termuat di keduanya."""
+        differs = np.flatnonzero((assignment != target) & (assignment >= 0) & (target >= 0))
+        return list(zip(differs.tolist(), target[differs].tolist()))
 
-        # 4. Cari SEMUA slot yang aman untuk 20ft dengan aturan On Deck/Under Deck
-        safe_20ft_slots = []
-        for coords in self.valid_slots_coords_20ft:
-            t_idx, b_idx, r_idx = coords
-            tier_id = TIERS[t_idx]
+    def _velocity_update(self, particle):
+        """
+        Update PSO diskrit (swap-sequence): v = w*v (+) c1*r1*(pbest - x) (+) c2*r2*(gbest - x), lalu x = x + v.
+        Koefisien a*v berarti setiap langkah di v dipertahankan dengan peluang min(1, a). Komponen diterapkan
+        berurutan, dan selisih ke pbest/gbest dihitung dari posisi terkini. Bila tidak ada langkah yang berlaku
+        (partikel sudah berada di pbest = gbest), satu _safe_swap acak dipakai sebagai turbulensi.
+        """
+        stats, rng = self.stats, self.rng
+        with stats.phase('copy'):
+            position, moments, moved = particle['position'], particle['moments'].copy(), set()
+            occupant = self._occupants(position)
+        with stats.phase('swap'):
+            velocity = []
+            for moves, weight in ((particle['velocity'], self.inertia),
+                                  (self._moves_toward(position, particle['pbest_position']), self.cognitive * rng.random()),
+                                  (self._moves_toward(position, self.gbest_assignment), self.social * rng.random())):
+                for container, slot in moves:
+                    if (weight >= 1.0 or rng.random() < weight) and self._apply_move(position, occupant, container, slot, moments, moved):
+                        velocity.append((container, slot))
+            if not velocity: position = self._safe_swap(position, moments, moved)
+            particle['velocity'] = velocity[-self.max_velocity:] if self.max_velocity else velocity
+        stats.count('swaps', max(len(velocity), 1))
+        return position, moments, moved
 
-            if repaired_plan[coords] != 0: continue
+    # MARK: Langkah Partikel
+    def _check_swarm(self, WEIGHT_PENALTY):
+        """Mode konsistensi: fitness pbest yang tersimpan harus sama dengan evaluasi batch seluruh swarm."""
+        fitness, _ = self._calculate_fitness_batch(self._pbest_positions, WEIGHT_PENALTY)
+        stored = np.array([particle['pbest_fitness'] for particle in self.swarm])
+        if not np.allclose(fitness, stored, rtol=1e-9):
+            raise RuntimeError(f"Fitness pbest tidak konsisten pada partikel {np.flatnonzero(~np.isclose(fitness, stored, rtol=1e-9)).tolist()}.")
 
-            is_safe = False
-            if tier_id < 82: # UNDER DECK
-                ceiling = ceilings.get((b_idx, r_idx), -1)
-                if ceiling == -1 or t_idx < ceiling:
-                    is_safe = True
-            else: # ON DECK
-                is_safe = True
-            
-            if is_safe:
-                safe_20ft_slots.append(coords)
-        
-        safe_20ft_slots.sort(key=lambda c: self.slot_properties_20ft[c]['vcg'])
+    def _advance_particle(self, particle, TIERS, WEIGHT_PENALTY):
+        """Satu langkah partikel: update posisi (random walk / kecepatan), repair inkremental, lalu fitness dari momen berjalan."""
+        stats = self.stats
+        position, moments, moved = self._update_particle_position(particle)
+        if self.consistency_check:
+            with stats.phase('consistency_check'):
+                self._check_moments(position, moments)
+                full_repair = self._repair_assignment(position, TIERS) if not self.exact_20ft else position.copy()
+        # Repair inkremental: hanya kontainer yang dipindah swap yang diendapkan kembali
+        with stats.phase('repair'):
+            if self.exact_20ft: position = self._solve_20ft(position, moments, WEIGHT_PENALTY, TIERS)
+            else: position = self._repair_moved(position, moved, moments)
+        if self.consistency_check:
+            if self.exact_20ft: full_repair = self._solve_20ft(full_repair, self._assignment_moments(full_repair), WEIGHT_PENALTY, TIERS)
+            with stats.phase('consistency_check'):
+                self._check_moments(position, moments)
+                if self._canonical_positions: self._check_repair(position, full_repair)  # warm start: repair inkremental tidak kanonik
+        with stats.phase('fitness'):
+            fitness, summary = self._fitness_from_moments(moments, WEIGHT_PENALTY)
+        stats.count('repairs'); stats.count('evaluations')
+        return position, moments, fitness, summary
 
-        # 5. Isi kembali slot aman dengan kontainer 20ft terurut
-        for i, cid in enumerate(sorted_20ft_ids):
-            if i < len(safe_20ft_slots):
-                repaired_plan[safe_20ft_slots[i]] = cid
+    def _accept_particle(self, particle, position, moments, fitness, summary):
+        """Perbarui pbest partikel & gbest swarm (salinan in-place)."""
+        stats = self.stats
+        with stats.phase('bookkeeping'):
+            if position is not particle['position']: np.copyto(particle['position'], position)
+            particle['moments'][:] = moments
+            if fitness < particle['pbest_fitness']:
+                particle['pbest_fitness'], particle['pbest_moments'][:] = fitness, moments
+                np.copyto(particle['pbest_position'], position)
+                stats.count('pbest_improvements')
+            if fitness < self.gbest_fitness:
+                self._update_gbest(position, fitness, summary)
+                stats.count('gbest_improvements')
 
-        return repaired_plan
+    def _step_swarm(self, TIERS, WEIGHT_PENALTY):
+        """Satu iterasi serial: setiap partikel di-update, di-repair & dievaluasi, lalu pbest/gbest diperbarui."""
+        for particle in self.swarm:
+            self._accept_particle(particle, *self._advance_particle(particle, TIERS, WEIGHT_PENALTY))
 
-    def _safe_swap(self, position):
-        new_pos = position
-        if random.random() < 0.5:
-            ids_20ft = [(c, v) for c, v in np.ndenumerate(new_pos) if v != 0 and v != 'OCCUPIED_40FT' and self.container_dict.get(v, {}).get('size') == 20]
-            if len(ids_20ft) >= 2: (c1, v1), (c2, v2) = random.sample(ids_20ft, 2); new_pos[c1], new_pos[c2] = v2, v1
-        else:
-            ids_40ft = [(c, v) for c, v in np.ndenumerate(new_pos) if v != 0 and v != 'OCCUPIED_40FT' and self.container_dict.get(v, {}).get('size') == 40]
-            if len(ids_40ft) >= 2:
-                (c1, v1), (c2, v2) = random.sample(ids_40ft, 2)
-                new_pos[c1], new_pos[c2] = v2, v1
-                c1_occupied, c2_occupied = (c1[0], c1[1]+1, c1[2]), (c2[0], c2[1]+1, c2[2])
-                new_pos[c1_occupied], new_pos[c2_occupied] = new_pos[c2_occupied], new_pos[c1_occupied]
-        return new_pos
+    # MARK: Main
+    def run(self, MAX_ITERATIONS, TIERS, NUM_PARTICLES, WEIGHT_PENALTY, n_workers=None, profile=False, trace_path=None,
+            time_budget=None, stagnation_iterations=None, stagnation_epsilon=0.0, warm_start=None, warm_start_swaps=3,
+            checkpoint_path=None, checkpoint_every=10, resume=False, polish=False, polish_time_budget=None):
+        """
+        Jalankan PSO. n_workers > 1 mengevaluasi partikel secara paralel di ProcessPoolExecutor
+        (geometri read-only ditaruh sekali di shared memory, lihat pso_parallel.py).
+        profile=True (atau trace_path) merekam waktu per fase & penghitung ke self.stats (RunStats);
+        trace_path menulis satu baris JSON per iterasi. Dalam mode paralel, fase swap/repair/fitness
+        terjadi di worker dan tercatat sebagai 'parallel_evaluate'.
 
-    def _update_particle_position(self, particle):
-        new_pos = copy.deepcopy(particle['pbest_position'])
-        for _ in range(5):
-            new_pos = self._safe_swap(new_pos)
-        return new_pos
+        Mode anytime: run berhenti lebih awal bila waktu sejak run() dimulai melewati time_budget (detik),
+        atau gbest tidak membaik lebih dari stagnation_epsilon selama stagnation_iterations iterasi.
+        MAX_ITERATIONS=None berarti tanpa batas iterasi (wajib ada time_budget/stagnation_iterations).
+        Alasan berhenti disimpan di self.stop_reason (STOP_*), jumlah iterasi di self.iterations_run.
 
-    def _calculate_fitness(self, plan, WEIGHT_PENALTY):
-        cargo_weight, cargo_moment_l, cargo_moment_v, cargo_moment_t = 0, 0, 0, 0
-        for coords, c_id in np.ndenumerate(plan):
-            if c_id != 0 and c_id != 'OCCUPIED_40FT' and c_id in self.container_dict:
-                container, weight = self.container_dict[c_id], self.container_dict[c_id]['weight']
-                props = self.slot_properties_20ft.get(coords) if container['size'] == 20 else self.slot_properties_40ft.get(coords)
-                if props:
-                    cargo_weight += weight; cargo_moment_l += weight * props['lcg']
-                    cargo_moment_v += weight * props['vcg']; cargo_moment_t += weight * props['tcg']
-        lightship_moment_l, lightship_moment_v, lightship_moment_t = self.lightship_weight*self.lightship_lcg, self.lightship_weight*self.lightship_vcg, self.lightship_weight*self.lightship_tcg
-        tanks_weight, tanks_moment_l, tanks_moment_v, tanks_moment_t = 0, 0, 0, 0
-        for tank in self.tanks_data:
-            tanks_weight += tank['weight']; tanks_moment_l += tank['weight']*tank['lcg']
-            tanks_moment_v += tank['weight']*tank['vcg']; tanks_moment_t += tank['weight']*tank['tcg']
-        total_weight = self.lightship_weight + cargo_weight + tanks_weight
-        if total_weight == 0: return float('inf'), {}
-        total_moment_l, total_moment_v, total_moment_t = lightship_moment_l+cargo_moment_l+tanks_moment_l, lightship_moment_v+cargo_moment_v+tanks_moment_v, lightship_moment_t+cargo_moment_t+tanks_moment_t
-        final_ship_lcg, final_ship_vcg, final_ship_tcg = total_moment_l/total_weight, total_moment_v/total_weight, total_moment_t/total_weight
-        penalties = defaultdict(float)
-        penalties["vertical_moment"], penalties["longitudinal_balance"] = total_moment_v, abs(final_ship_lcg - self.target_lcg)
-        if abs(final_ship_tcg) > 0.2: penalties["stability_tcg"] = abs(final_ship_tcg) - 0.2
-        total_fitness = sum(WEIGHT_PENALTY[key] * val for key, val in penalties.items())
-        summary = {"fitness": total_fitness, "ship_lcg": final_ship_lcg, "ship_vcg": final_ship_vcg, "ship_tcg": final_ship_tcg, "total_weight": total_weight}
-        return total_fitness, summary
+        warm_start = {container_id: (t_idx, b_idx, r_idx)} dari rencana sebelumnya (warm_start.load_placements):
+        denah awal dibangun oleh _warm_start_plan, partikel pertama tepat di denah itu dan partikel lain hanya
+        warm_start_swaps swap acak darinya. Kontainer yang slotnya sama dengan rencana lama dikunci (_set_pinned):
+        hanya kontainer baru/dipindah yang ikut swap & repair, dan gbest yang dikembalikan diperiksa tetap menaruh
+        kontainer tersebut di slot lamanya. Cocok dikombinasikan dengan stagnation_iterations untuk replan cepat.
 
-    # MARK: Main
-    def run(self, MAX_ITERATIONS, TIERS, NUM_PARTICLES, WEIGHT_PENALTY):
-        base_plan = self._create_base_plan(TIERS)
-        self._initialize_swarm(base_plan, NUM_PARTICLES, TIERS, WEIGHT_PENALTY)
-        print("\n--- Memulai Iterasi PSO ---")
-        for i in range(MAX_ITERATIONS):
-            for particle in self.swarm:
-                repaired_position = self._repair_plan(self._update_particle_position(particle), TIERS)
-                new_fitness, new_summary = self._calculate_fitness(repaired_position, WEIGHT_PENALTY)
-                if new_fitness < particle['pbest_fitness']: particle['pbest_fitness'], particle['pbest_position'] = new_fitness, copy.deepcopy(repaired_position)
-                if new_fitness < self.gbest_fitness: self.gbest_fitness, self.gbest_position, self.gbest_summary = new_fitness, copy.deepcopy(repaired_position), new_summary
-            if (i + 1) % 10 == 0: print(f"Iterasi {i+1}/{MAX_ITERATIONS} | Best Fitness: {self.gbest_fitness:.2f}")
-        print("\n--- Optimasi Selesai ---")
-        return self.gbest_position, self.gbest_summary
+        checkpoint_path: state swarm lengkap (termasuk state RNG) ditulis atomik ke file .npz setiap
+        checkpoint_every iterasi dan saat run berhenti (lihat pso_checkpoint.py). resume=True melanjutkan dari
+        checkpoint tersebut bila ada (warm_start diabaikan); hasilnya identik dengan run yang tidak terputus.
+        time_budget dihitung ulang per pemanggilan run(); checkpoint yang berhenti karena stagnasi tidak dilanjutkan.
 
-    def export_plan_to_excel(self, plan, TIERS, BAYS, MAX_ROWS, filename="stowage_plan.xlsx"):
+        polish=True menjalankan local search polish() pada gbest setelah iterasi selesai (polish_time_budget detik).
+        """
+        if MAX_ITERATIONS is None and time_budget is None and stagnation_iterations is None:
+            raise ValueError("MAX_ITERATIONS=None membutuhkan time_budget atau stagnation_iterations.")
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        self.stop_reason, self.iterations_run = STOP_MAX_ITERATIONS, 0
+        self._start_convergence()
+        self.stats = stats = RunStats(trace_path) if profile or trace_path else NULL_STATS
+        resumed = load_checkpoint(self, checkpoint_path, NUM_PARTICLES, WEIGHT_PENALTY) if resume and checkpoint_path else None
+        if resumed is None:
+            with stats.phase('base_plan'):
+                base_plan = self._initial_plan(TIERS, WEIGHT_PENALTY) if warm_start is None else self._warm_start_plan(warm_start, TIERS)
+            if warm_start is None:
+                self._initialize_swarm(base_plan, NUM_PARTICLES, TIERS, WEIGHT_PENALTY, keep_base=self.initializer == INIT_BALANCED)
+            else:
+                self._initialize_swarm(base_plan, NUM_PARTICLES, TIERS, WEIGHT_PENALTY, init_swaps=warm_start_swaps, keep_base=True,
+                                       pinned_slots=self._unchanged_slots(self._encode_plan(base_plan), warm_start))
+            start, last_improvement, reference_fitness, self._parallel_base_seed = 0, 0, self.gbest_fitness, None
+            self._canonical_positions = warm_start is None
+        else:
+            start, last_improvement, reference_fitness = resumed['next_iteration'], resumed['last_improvement'], resumed['reference_fitness']
+            self.iterations_run = start
+            print(f"💾 Melanjutkan dari checkpoint {checkpoint_path} (iterasi {start}, Best Fitness: {self.gbest_fitness:.2f})")
+            if resumed['stop_reason'] == STOP_STAGNATION: MAX_ITERATIONS, self.stop_reason = start, STOP_STAGNATION
+        print("\n--- Memulai Iterasi PSO ---")
+        if n_workers and n_workers > 1:
+            from pso_parallel import ParallelSwarmEvaluator
+            if self._parallel_base_seed is None: self._parallel_base_seed = self.rng.getrandbits(63)
+            evaluator = ParallelSwarmEvaluator(self, n_workers, TIERS, WEIGHT_PENALTY, base_seed=self._parallel_base_seed)
+        else:
+            evaluator = None
         try:
-            from pathlib import Path
-
-            # Pastikan folder export ada, dan pakai nama file saja (tanpa path) di dalam export/
-            export_dir = Path("export")
-            export_dir.mkdir(parents=True, exist_ok=True)
-            out_path = export_dir / Path(filename).name
+            for i in (range(start, MAX_ITERATIONS) if MAX_ITERATIONS is not None else itertools.count(start)):
+                if evaluator is not None:
+                    with stats.phase('parallel_evaluate'):
+                        results = evaluator.evaluate(self.swarm, self.gbest_assignment, i)
+                    stats.count('evaluations', len(results))
+                    for particle, (*result, velocity) in zip(self.swarm, results):
+                        particle['velocity'] = velocity
+                        self._accept_particle(particle, *result)
+                else:
+                    self._step_swarm(TIERS, WEIGHT_PENALTY)
+                if self.consistency_check:
+                    with stats.phase('consistency_check'): self._check_swarm(WEIGHT_PENALTY)
+                stats.end_iteration(i, self.gbest_fitness)
+                self.iterations_run = i + 1
+                if (i + 1) % 10 == 0: print(f"Iterasi {i+1}/{MAX_ITERATIONS or '-'} | Best Fitness: {self.gbest_fitness:.2f}")
 
-            print(f"\n⚙️ Mengekspor denah ke file Excel: {out_path}...")
-            stowage_list = []
-            for coords, c_id in np.ndenumerate(plan):
-                if c_id != 0 and c_id != 'OCCUPIED_40FT':
-                    container_info, tier_id, row_index = self.container_dict[c_id], TIERS[coords[0]], coords[2]
-                    bay_id_out = (BAYS[coords[1]] + 1) if container_info['size'] == 40 else BAYS[coords[1]]
-                    bay_str, tier_str, row_str = f"{bay_id_out:02d}", f"{tier_id:02d}", f"{row_index:02d}"
-                    row_str = value_by_indexed_order(int(MAX_ROWS), int(row_str)) 
-                    
-                    stowage_list.append({
-                        'No.': "",
-                        'Booking No.': "",
-                        'Container ID': c_id,
-                        'Weight (VGM)': container_info['weight']/1000,
-                        'Bay': bay_str,
-                        'Row': row_str,
-                        'Tier': tier_str,
-                        'Slot': f"{bay_str}{row_str}{tier_str}",
-                        'Load Port': 'IDJKT',
-                        'Discharge Port': 'IDSUB',
-                        'Container ISO': '45G1' if container_info['size'] == 40 else '22G1',
-                        'F/E': 'F',
-                        'UN No.': "",
-                        'DG Class': "",
-                        "Group Type": "",
-                        "Over Height": "",
-                        "Over Size Left": "",
-                        "Over Size Right": "",
-                        "Over Size Front": "",
-                        "Over Size Aft": "",
-                        "Carrier": "",
-                        "Commodity": ""
-                    })
-            if stowage_list:
-                df_export = pd.DataFrame(stowage_list).sort_values(by=['Bay', 'Row', 'Tier'])
-                final_order = [
-                    'No.', 'Booking No.', 'Container ID', 'Bay', 'Row', 'Tier', 'Slot', 'Load Port', 'Discharge Port', 'Container ISO', 'F/E', 'Weight (VGM)',
-                    'UN No.', 'DG Class', 'Group Type', 'Over Height', 'Over Size Left', 'Over Size Right', 'Over Size Front', 'Over Size Aft', 'Carrier', 'Commodity'
-                ]
-                with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
-                    df_export[final_order].to_excel(writer, index=False, sheet_name="Stowage Plan")
-                print(f"✅ Berhasil! Denah muatan telah disimpan sebagai '{out_path}'.")
-            else:
-                print("⚠️ Tidak ada kontainer untuk diekspor.")
-        except Exception as e:
-            print(f"❌ Gagal mengekspor ke Excel: {e}")
-            
-def generate_order(n: int) -> list[int]:
-    if n <= 0:
-        return []
-    if n % 2 == 1:  # ganjil
-        evens_desc = list(range(n - 1, -1, -2))   # ... 8,6,4,2,0
-        odds_asc   = list(range(1, n - 1, 2))     # ... 1,3,5,7
-    else:           # genap
-        evens_desc = list(range(n, 1, -2))        # ... 8,6,4,2
-        odds_asc   = list(range(1, n, 2))         # ... 1,3,5,7
-    return evens_desc + odds_asc
+                # Kriteria berhenti anytime
+                if self.gbest_fitness < reference_fitness - stagnation_epsilon:
+                    last_improvement, reference_fitness = i + 1, self.gbest_fitness
+                stop_reason = None
+                if stagnation_iterations is not None and i + 1 - last_improvement >= stagnation_iterations: stop_reason = STOP_STAGNATION
+                elif deadline is not None and time.perf_counter() >= deadline: stop_reason = STOP_TIME_BUDGET
+                if checkpoint_path and (stop_reason or (i + 1) % checkpoint_every == 0 or i + 1 == MAX_ITERATIONS):
+                    with stats.phase('checkpoint'):
+                        save_checkpoint(self, checkpoint_path, WEIGHT_PENALTY, i + 1, last_improvement, reference_fitness, stop_reason)
+                if stop_reason:
+                    self.stop_reason = stop_reason; break
+        finally:
+            if evaluator is not None: evaluator.close()
+            stats.close()
+        print(f"\n--- Optimasi Selesai ({self.stop_reason}, {self.iterations_run} iterasi) ---")
+        if stats.enabled: stats.report()
+        if polish and self.gbest_assignment is not None: self.polish(WEIGHT_PENALTY, time_budget=polish_time_budget, TIERS=TIERS)
+        self._check_pinned()
+        self.gbest_position = self._decode_assignment(self.gbest_assignment) if self.gbest_assignment is not None else None
+        return self.gbest_position, self.gbest_summary
 
-def value_by_indexed_order(n: int, x: int):
-    order = generate_order(n)
-    if 0 <= x < len(order):
-        v = order[x]
-        return f"{v:02d}"  # selalu 2 digit
-    return None
+    def run_islands(self, MAX_ITERATIONS, TIERS, NUM_PARTICLES, WEIGHT_PENALTY, n_islands=4, migration_interval=10,
+                    n_migrants=1, island_penalties=None):
+        """
+        Model pulau: n_islands swarm independen (seed & penalti sendiri) di proses terpisah, bertukar
+        pbest terbaik setiap migration_interval iterasi (lihat pso_islands.py). Return sama seperti run().
+        """
+        from pso_islands import run_islands
+        self.stats = NULL_STATS
+        run_islands(self, MAX_ITERATIONS, TIERS, NUM_PARTICLES, WEIGHT_PENALTY, n_islands, migration_interval,
+                    n_migrants, island_penalties)
+        self.stop_reason, self.iterations_run = STOP_MAX_ITERATIONS, MAX_ITERATIONS
+        self.gbest_position = self._decode_assignment(self.gbest_assignment)
+        return self.gbest_position, self.gbest_summary
@@ -0,0 +1,156 @@
+import os
+import queue
+import sys
+import time
+import traceback
+import multiprocessing as mp
+
+import numpy as np
+
+from pso_class import INIT_BALANCED, PSO_Stowage_Planner
+from pso_parallel import SharedArrays, attach_shared_arrays
+
+MIGRATION_TIMEOUT = 600  # detik menunggu migran dari pulau tetangga sebelum pulau dianggap gagal
+
+# Model pulau: K swarm independen di proses terpisah (topologi cincin). Setiap migration_interval
+# iterasi pulau k mengirim n_migrants pbest terbaiknya ke pulau k+1 dan menerima migran dari pulau k-1.
+# Migrasi sinkron (pulau menunggu migran), sehingga hasil reprodusibel untuk seed planner yang sama.
+# Pesan pulau ke proses utama: (indeks, jenis, isi) dengan jenis "progress" (fitness gbest pulau menurut
+# penalti acuan, setiap migrasi), "result" (hasil akhir) atau "error" (traceback).
+
+# MARK: Variasi Penalti
+def emphasis_penalties(WEIGHT_PENALTY, n_islands, factor=2.0):
+    """Pulau 0 memakai WEIGHT_PENALTY apa adanya; pulau k>0 mengalikan satu komponen penalti (bergiliran) dengan factor."""
+    keys = list(WEIGHT_PENALTY)
+    penalties = [dict(WEIGHT_PENALTY)]
+    for k in range(1, n_islands):
+        penalty = dict(WEIGHT_PENALTY)
+        penalty[keys[(k - 1) % len(keys)]] *= factor
+        penalties.append(penalty)
+    return penalties
+
+# MARK: Migrasi
+def _emigrants(planner, n_migrants):
+    order = np.argsort([particle['pbest_fitness'] for particle in planner.swarm], kind='stable')[:n_migrants]
+    return planner._pbest_positions[order].copy()
+
+def _receive_migrants(planner, immigrants, WEIGHT_PENALTY):
+    """
+    Migran menggantikan partikel dengan pbest terburuk bila lebih baik menurut penalti pulau ini sendiri
+    (fitness selalu dihitung ulang, karena penalti tiap pulau bisa berbeda). Return jumlah migran diterima.
+    """
+    moments = planner._batch_moments(immigrants)
+    fitness, summaries = planner._fitness_from_moments_batch(moments, WEIGHT_PENALTY)
+    worst = np.argsort([particle['pbest_fitness'] for particle in planner.swarm], kind='stable')[::-1]
+    accepted = 0
+    for k, m in zip(worst, np.argsort(fitness, kind='stable')):
+        particle = planner.swarm[k]
+        if fitness[m] >= particle['pbest_fitness']: continue
+        np.copyto(particle['position'], immigrants[m]); np.copyto(particle['pbest_position'], immigrants[m])
+        particle['moments'][:], particle['pbest_moments'][:] = moments[m], moments[m]
+        particle['pbest_fitness'], particle['velocity'] = float(fitness[m]), []
+        if fitness[m] < planner.gbest_fitness:
+            planner._update_gbest(immigrants[m], float(fitness[m]), summaries[m])
+        accepted += 1
+    return accepted
+
+def _record_convergence(planner, fitness):
+    """Catat (detik sejak awal, fitness) di planner.convergence bila fitness memperbaiki gbest global sejauh ini."""
+    if not planner.convergence or fitness < planner.convergence[-1][1]:
+        planner.convergence.append((time.perf_counter() - planner._run_started, fitness))
+
+# MARK: Worker Pulau
+def _island_main(index, spec, scalars, seed, TIERS, NUM_PARTICLES, WEIGHT_PENALTY, REFERENCE_PENALTY, MAX_ITERATIONS,
+                 migration_interval, n_migrants, inbox, outbox, results):
+    sys.stdout = open(os.devnull, "w")  # log iterasi tiap pulau tidak dicetak; ringkasan dicetak proses utama
+    try:
+        blocks, arrays = attach_shared_arrays(spec)
+        planner = PSO_Stowage_Planner._from_kernel_state(arrays, scalars, seed)
+        planner._initialize_swarm(planner._initial_plan(TIERS, WEIGHT_PENALTY), NUM_PARTICLES, TIERS, WEIGHT_PENALTY,
+                                  keep_base=planner.initializer == INIT_BALANCED)
+        accepted, history = 0, []
+        for i in range(MAX_ITERATIONS):
+            planner._step_swarm(TIERS, WEIGHT_PENALTY)
+            if (i + 1) % migration_interval == 0 and i + 1 < MAX_ITERATIONS:
+                outbox.put(_emigrants(planner, n_migrants))
+                accepted += _receive_migrants(planner, inbox.get(timeout=MIGRATION_TIMEOUT), WEIGHT_PENALTY)
+                history.append(planner.gbest_fitness)
+                reference, _ = planner._fitness_from_moments(planner._assignment_moments(planner.gbest_assignment), REFERENCE_PENALTY)
+                results.put((index, "progress", float(reference)))
+        results.put((index, "result", {"gbest_assignment": planner.gbest_assignment, "gbest_fitness": planner.gbest_fitness,
+                                   "pbest_positions": planner._pbest_positions, "migrants_accepted": accepted,
+                                   "history": history}))
+    except BaseException:
+        results.put((index, "error", traceback.format_exc()))
+
+# MARK: Run Pulau
+def run_islands(planner, MAX_ITERATIONS, TIERS, NUM_PARTICLES, WEIGHT_PENALTY, n_islands=4, migration_interval=10,
+                n_migrants=1, island_penalties=None):
+    """
+    Jalankan n_islands swarm PSO di proses terpisah dengan migrasi cincin periodik. Geometri read-only
+    dibagikan lewat shared memory (SharedArrays) seperti mode n_workers. island_penalties: daftar
+    WEIGHT_PENALTY per pulau (mis. emphasis_penalties), default semua pulau memakai WEIGHT_PENALTY.
+    Kandidat akhir (gbest & semua pbest tiap pulau) dinilai ulang dengan WEIGHT_PENALTY acuan; yang
+    terbaik menjadi gbest planner. Ringkasan per pulau disimpan di planner.island_results.
+    planner.convergence mencatat (detik, fitness acuan) setiap kali migrasi atau penggabungan akhir
+    memperbaiki gbest global, sehingga time_to_target berlaku seperti pada run().
+    """
+    if migration_interval < 1: raise ValueError("migration_interval harus >= 1.")
+    if not 1 <= n_migrants <= NUM_PARTICLES: raise ValueError("n_migrants harus di antara 1 dan NUM_PARTICLES.")
+    penalties = list(island_penalties) if island_penalties is not None else [WEIGHT_PENALTY] * n_islands
+    if len(penalties) != n_islands: raise ValueError(f"island_penalties harus berisi {n_islands} penalti.")
+    penalties = [WEIGHT_PENALTY if p is None else p for p in penalties]
+
+    planner._start_convergence()
+    base_seed = planner.rng.getrandbits(63)
+    seeds = [int(np.random.SeedSequence([base_seed, k]).generate_state(1, np.uint64)[0]) for k in range(n_islands)]
+    arrays, scalars = planner._kernel_state()
+    print(f"🏝️  Menjalankan {n_islands} pulau PSO ({NUM_PARTICLES} partikel/pulau, migrasi tiap {migration_interval} iterasi)...")
+
+    ctx = mp.get_context()
+    inboxes = [ctx.Queue() for _ in range(n_islands)]
+    results_queue = ctx.Queue()
+    shared = SharedArrays(arrays)
+    processes, results = [], {}
+    try:
+        for k in range(n_islands):
+            process = ctx.Process(target=_island_main, daemon=True,
+                                  args=(k, shared.spec, scalars, seeds[k], list(TIERS), NUM_PARTICLES, penalties[k], WEIGHT_PENALTY, MAX_ITERATIONS,
+                                        migration_interval, n_migrants, inboxes[k], inboxes[(k + 1) % n_islands], results_queue))
+            process.start(); processes.append(process)
+        while len(results) < n_islands:
+            try:
+                index, kind, payload = results_queue.get(timeout=1)
+            except queue.Empty:
+                dead = [k for k, p in enumerate(processes) if k not in results and p.exitcode not in (None, 0)]
+                if dead: raise RuntimeError(f"Proses pulau {dead} berhenti tanpa hasil.")
+                continue
+            if kind == "error": raise RuntimeError(f"Pulau {index} gagal:\n{payload}")
+            if kind == "progress": _record_convergence(planner, payload)
+            else: results[index] = payload
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive(): process.terminate()
+        shared.close()
+
+    # Nilai ulang semua kandidat dengan penalti acuan agar pulau dengan penekanan berbeda bisa dibandingkan
+    planner.island_results, best = [], None
+    for k in range(n_islands):
+        result = results[k]
+        candidates = np.vstack([result["gbest_assignment"][None, :], result["pbest_positions"]])
+        fitness, summaries = planner._calculate_fitness_batch(candidates, WEIGHT_PENALTY)
+        j = int(np.argmin(fitness))
+        planner.island_results.append({"island": k, "seed": seeds[k], "weight_penalty": penalties[k],
+                                       "island_fitness": result["gbest_fitness"], "fitness": float(fitness[j]),
+                                       "migrants_accepted": result["migrants_accepted"], "history": result["history"]})
+        if best is None or fitness[j] < best[1]:
+            best = (candidates[j], float(fitness[j]), summaries[j])
+        print(f"   - Pulau {k}: fitness {fitness[j]:.2f} (penalti pulau: {result['gbest_fitness']:.2f}), "
+              f"{result['migrants_accepted']} migran diterima")
+
+    planner.gbest_assignment, planner.gbest_fitness, planner.gbest_summary = best[0].copy(), best[1], best[2]
+    _record_convergence(planner, planner.gbest_fitness)
+    print(f"\n--- Optimasi Pulau Selesai ({MAX_ITERATIONS} iterasi) | Best Fitness: {planner.gbest_fitness:.2f} ---")
+    return planner.gbest_assignment, planner.gbest_summary
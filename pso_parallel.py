@@ -0,0 +1,96 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pso_class import PSO_Stowage_Planner
+
+# MARK: Shared Arrays
+class SharedArrays:
+    """Menyalin dict array NumPy ke blok shared memory sekali; `spec` (picklable) dipakai worker untuk attach tanpa copy."""
+    def __init__(self, arrays):
+        self._blocks, self.spec = [], {}
+        try:
+            for name, arr in arrays.items():
+                arr = np.ascontiguousarray(arr)
+                shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+                self._blocks.append(shm)
+                np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+                self.spec[name] = (shm.name, arr.shape, arr.dtype.str)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        for shm in self._blocks:
+            shm.close(); shm.unlink()
+        self._blocks = []
+
+def attach_shared_arrays(spec):
+    """Attach ke blok dari SharedArrays.spec. Return (blocks, arrays); simpan `blocks` selama array dipakai."""
+    blocks, arrays = [], {}
+    for name, (shm_name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        arr.flags.writeable = False
+        blocks.append(shm); arrays[name] = arr
+    return blocks, arrays
+
+# MARK: Worker
+_WORKER = {}
+
+def _init_worker(spec, scalars, TIERS, WEIGHT_PENALTY):
+    blocks, arrays = attach_shared_arrays(spec)
+    _WORKER.update(blocks=blocks, planner=PSO_Stowage_Planner._from_kernel_state(arrays, scalars),
+                   TIERS=TIERS, WEIGHT_PENALTY=WEIGHT_PENALTY)
+
+def _advance_chunk(particles, gbest_assignment, seeds):
+    """
+    Update + repair + fitness untuk sekelompok partikel; tiap partikel memakai RNG dengan seed sendiri.
+    Return [(position, moments, fitness, summary, velocity), ...].
+    """
+    planner, TIERS, WEIGHT_PENALTY = _WORKER['planner'], _WORKER['TIERS'], _WORKER['WEIGHT_PENALTY']
+    planner.gbest_assignment = gbest_assignment
+    results = []
+    for particle, seed in zip(particles, seeds):
+        planner.rng.seed(seed)
+        results.append((*planner._advance_particle(particle, TIERS, WEIGHT_PENALTY), particle['velocity']))
+    return results
+
+# MARK: Evaluator
+class ParallelSwarmEvaluator:
+    """
+    Mengevaluasi satu iterasi swarm di ProcessPoolExecutor. Geometri read-only (mask, properti slot,
+    penempatan 40ft, berat kontainer) ditaruh sekali di shared memory, bukan di-pickle per task.
+    Seed tiap partikel diturunkan dari (base_seed, iterasi, indeks partikel), sehingga hasilnya
+    reprodusibel dan tidak bergantung pada jumlah worker maupun urutan penjadwalan.
+    """
+    def __init__(self, planner, n_workers, TIERS, WEIGHT_PENALTY, base_seed):
+        arrays, scalars = planner._kernel_state()
+        self.n_workers, self.base_seed = n_workers, base_seed
+        self.shared = SharedArrays(arrays)
+        try:
+            self.executor = ProcessPoolExecutor(n_workers, initializer=_init_worker,
+                                                initargs=(self.shared.spec, scalars, list(TIERS), WEIGHT_PENALTY))
+        except Exception:
+            self.shared.close()
+            raise
+
+    def particle_seed(self, iteration, index):
+        return int(np.random.SeedSequence([self.base_seed, iteration, index]).generate_state(1, np.uint64)[0])
+
+    def evaluate(self, swarm, gbest_assignment, iteration):
+        """Return [(position, moments, fitness, summary, velocity), ...] sesuai urutan partikel di swarm."""
+        fields = ('position', 'moments', 'velocity', 'pbest_position', 'pbest_moments')
+        chunks = [c for c in np.array_split(np.arange(len(swarm)), self.n_workers) if len(c)]
+        futures = [self.executor.submit(_advance_chunk, [{f: swarm[k][f] for f in fields} for k in chunk], gbest_assignment,
+                                        [self.particle_seed(iteration, k) for k in chunk])
+                   for chunk in chunks]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def close(self):
+        self.executor.shutdown()
+        self.shared.close()
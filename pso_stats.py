@@ -0,0 +1,84 @@
+import json
+import time
+
+from collections import defaultdict
+from contextlib import nullcontext
+
+# MARK: Run Stats
+class RunStats:
+    """
+    Statistik per fase untuk PSO_Stowage_Planner.run: waktu (detik) per fase dan penghitung kejadian.
+    Jika trace_path diisi, setiap iterasi menulis satu baris JSON (delta fase & penghitung iterasi itu).
+    """
+    enabled = True
+
+    def __init__(self, trace_path=None):
+        self.timings, self.counters = defaultdict(float), defaultdict(int)
+        self.iterations, self.started = 0, time.perf_counter()
+        self._trace = open(trace_path, "w", encoding="utf-8") if trace_path else None
+        self._last_timings, self._last_counters = {}, {}
+
+    def phase(self, name):
+        return _Phase(self.timings, name)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def end_iteration(self, iteration, gbest_fitness):
+        self.iterations = iteration + 1
+        if self._trace is None: return
+        record = {"iteration": iteration + 1, "gbest_fitness": gbest_fitness, "elapsed_s": time.perf_counter() - self.started,
+                  "timings": {k: v - self._last_timings.get(k, 0.0) for k, v in self.timings.items()},
+                  "counters": {k: v - self._last_counters.get(k, 0) for k, v in self.counters.items()}}
+        self._trace.write(json.dumps(record) + "\n")
+        self._last_timings, self._last_counters = dict(self.timings), dict(self.counters)
+
+    def close(self):
+        self.wall_time = time.perf_counter() - self.started
+        if self._trace is not None:
+            self._trace.close(); self._trace = None
+
+    def as_dict(self):
+        wall_time = getattr(self, "wall_time", time.perf_counter() - self.started)
+        return {"wall_time_s": wall_time, "iterations": self.iterations,
+                "timings": dict(self.timings), "counters": dict(self.counters)}
+
+    def report(self):
+        stats = self.as_dict()
+        print(f"\n--- ⏱️ Profil Run ({stats['iterations']} iterasi, {stats['wall_time_s']:.3f} s) ---")
+        for name, seconds in sorted(stats["timings"].items(), key=lambda kv: -kv[1]):
+            share = 100 * seconds / stats["wall_time_s"] if stats["wall_time_s"] else 0.0
+            print(f"   - {name:<20} {seconds:10.4f} s  ({share:5.1f}%)")
+        for name, value in sorted(stats["counters"].items()):
+            print(f"   - {name:<20} {value:10d}")
+
+class _Phase:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings, name):
+        self.timings, self.name = timings, name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timings[self.name] += time.perf_counter() - self.start
+
+class NullStats:
+    """Pengganti RunStats saat profiling mati: semua method no-op (overhead satu pemanggilan method)."""
+    enabled = False
+    _NULL_PHASE = nullcontext()
+
+    def phase(self, name):
+        return self._NULL_PHASE
+
+    def count(self, name, n=1):
+        pass
+
+    def end_iteration(self, iteration, gbest_fitness):
+        pass
+
+    def close(self):
+        pass
+
+NULL_STATS = NullStats()
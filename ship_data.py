@@ -1,17 +1,28 @@
 import math
+import numpy as np
 import pandas as pd
 import os, json, re
 import json
 
 from collections import defaultdict
-from container_data import count_containers, read_container_array
+from container_data import count_manifest_sizes, load_manifest
 from formula import build_ship_geometry, build_40ft_slots
+from npz_cache import CACHE_DIR, cache_path_for, load_npz, save_npz_atomic
 from pathlib import Path
+from ship_geometry import ShipGeometry, default_under_deck
+
+SHIP_XLSX_PATH = "./archive/ship_slot.xlsx"
+GEOMETRY_CACHE_VERSION = 2
+
+# --- KONFIGURASI ALGORITMA (default) ---
+DEFAULT_NUM_PARTICLES, DEFAULT_MAX_ITERATIONS = 50, 200
+DEFAULT_WEIGHT_PENALTY = {"vertical_moment": 0.0001, "longitudinal_balance": 100.0, "stability_tcg": 8000.0}
 
 # MARK: Read Ship All
 def read_ship_xlsx_all(expected_sheets: list[str] | None = None,
                     lowercase_headers: bool = True,
-                    include_sheet_col: bool = True):
+                    include_sheet_col: bool = True,
+                    file_path: str = SHIP_XLSX_PATH):
     """
     Gunakan read_ship_xlsx(...) untuk baca semua sheet,
     lalu kembalikan:
@@ -19,7 +30,8 @@ def read_ship_xlsx_all(expected_sheets: list[str] | None = None,
     - data_flat: list gabungan semua baris dari semua sheet.
     """
     data_by_sheet = read_ship_xlsx(expected_sheets=expected_sheets,
-                                lowercase_headers=lowercase_headers)
+                                lowercase_headers=lowercase_headers,
+                                file_path=file_path)
 
     # Coerce angka & flatten
     data_flat = []
@@ -106,16 +118,15 @@ def debugexport_txtfile(by_sheet):
 
 # MARK: Read Ship XLSX
 def read_ship_xlsx(expected_sheets: list[str] | None = None,
-                        lowercase_headers: bool = True) -> dict[str, list[dict]]:
+                        lowercase_headers: bool = True,
+                        file_path: str = SHIP_XLSX_PATH) -> dict[str, list[dict]]:
     """
-    Baca semua sheet dari ./archive/ship_slot.xlsx
+    Baca semua sheet dari file_path (default ./archive/ship_slot.xlsx)
     Return: { "Sheet1": [ {col: val, ...}, ... ], "Sheet2": [...], ... }
 
     - expected_sheets: jika diisi, fungsi akan validasi nama sheet wajib ada.
     - lowercase_headers: jika True, header akan dinormalisasi ke huruf kecil & strip spasi.
     """
-    file_path = "./archive/ship_slot.xlsx"
-
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File tidak ditemukan: {file_path}")
 
@@ -196,11 +207,13 @@ def find_allowed40ftbays(slots):
     list_allowed = sorted(list(allowed))
     return list_allowed, invalid
 
-# MARK: Default - Data Fisik Kapal
-def ship_data():
-    # ===============================================================================================================================================
-    bays, tiers, rows, slots, tanks = read_ship_xlsx_all(expected_sheets=["Bays", "Tiers", "Rows", "Slots", "Tanks"])
-    containers = read_container_array("./archive/container.xlsx")
+# MARK: Compile Geometry
+def compile_ship_geometry(file_path: str = SHIP_XLSX_PATH) -> dict:
+    """
+    Parse workbook kapal (openpyxl) dan bangun seluruh geometri sebagai array padat:
+    BAYS, TIERS, MAX_ROWS, valid_mask, koordinat & properti slot 20ft, penempatan & properti 40ft, tabel tanks.
+    """
+    bays, tiers, rows, slots, tanks = read_ship_xlsx_all(expected_sheets=["Bays", "Tiers", "Rows", "Slots", "Tanks"], file_path=file_path)
 
     # --- Data Fisik Kapal ---
     # Bay dari midship, negatif depan, positif belakang
@@ -210,6 +223,9 @@ def ship_data():
 
     BAYS = sorted(list(BAY_MAP.keys()))
     TIERS = sorted(list(TIER_MAP.keys()))
+    # Under Deck dari kolom Inhold sheet Tiers; tanpa kolom itu pakai konvensi nomor tier (ship_geometry)
+    TIER_INHOLD = {int(t['name'].strip().split()[-1]): bool(t['inhold']) for t in tiers if t.get('inhold') in (True, False)}
+    UNDER_DECK = [TIER_INHOLD[t] for t in TIERS] if len(TIER_INHOLD) == len(TIERS) else default_under_deck(TIERS).tolist()
     MAX_ROWS = len(rows)
     
     sorted_rows = sorted(ROW_MAP.items(), key=lambda kv: kv[1])  # sort by koordinat
@@ -228,12 +244,61 @@ def ship_data():
     # --- KONFIGURASI DAN EKSEKUSI ---
     VALID_SLOT_MASK_20FT, SLOT_PROPERTIES_20FT = build_ship_geometry(TIERS, BAYS, MAX_ROWS, SHIP_LAYOUT, ROW_MAP, BAY_MAP, TIER_MAP)
     VALID_PLACEMENTS_40FT, SLOT_PROPERTIES_40FT = build_40ft_slots(VALID_SLOT_MASK_20FT, SLOT_PROPERTIES_20FT, BAYS, ALLOWED_40FT_BAYS, TIERS, INVALID_40FT_SLOTS)
+
+    def props_array(props_by_coords):
+        return np.array([[p['lcg'], p['vcg'], p['tcg']] for p in props_by_coords.values()], dtype=np.float64).reshape(-1, 3)
+
+    return {
+        "version": np.array(GEOMETRY_CACHE_VERSION),
+        "bays": np.array(BAYS, dtype=np.int64), "tiers": np.array(TIERS, dtype=np.int64), "max_rows": np.array(MAX_ROWS),
+        "under_deck": np.array(UNDER_DECK, dtype=bool),
+        "valid_mask": VALID_SLOT_MASK_20FT,
+        "slot_coords_20ft": np.array(list(SLOT_PROPERTIES_20FT.keys()), dtype=np.int64).reshape(-1, 3),
+        "slot_props_20ft": props_array(SLOT_PROPERTIES_20FT),
+        "placements_40ft": np.array(VALID_PLACEMENTS_40FT, dtype=np.int64).reshape(-1, 3),
+        "slot_props_40ft": props_array(SLOT_PROPERTIES_40FT),
+        "tanks_json": np.array(json.dumps(tanks)),
+    }
+
+# MARK: Geometry Cache
+def load_ship_geometry(file_path: str = SHIP_XLSX_PATH, cache_dir: Path | str | None = CACHE_DIR) -> dict:
+    """
+    Geometri kapal terkompilasi (.npz) dengan kunci hash isi workbook. Workbook hanya di-parse ulang
+    bila isinya berubah (atau cache belum ada/rusak); cache_dir=None menonaktifkan cache.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File tidak ditemukan: {file_path}")
+    if cache_dir is None:
+        return compile_ship_geometry(file_path)
+
+    cache_path = cache_path_for(file_path, "ship_geometry", cache_dir)
+    geometry = load_npz(cache_path, GEOMETRY_CACHE_VERSION)
+    if geometry is not None:
+        print(f"⚡ Geometri kapal dimuat dari cache: {cache_path}")
+        return geometry
+
+    geometry = compile_ship_geometry(file_path)
+    save_npz_atomic(cache_path, geometry)
+    print(f"💾 Geometri kapal dikompilasi ke cache: {cache_path}")
+    return geometry
+
+def unpack_ship_geometry(geometry: dict):
+    """Array geometri terkompilasi -> struktur lama (BAYS, TIERS, MAX_ROWS, mask, dict properti, list 40ft, tanks)."""
+    return ShipGeometry.from_compiled(geometry).legacy() + (json.loads(str(geometry["tanks_json"])),)
+
+# MARK: Default - Data Fisik Kapal
+def ship_data(ship_path: str = SHIP_XLSX_PATH, container_path: str = "./archive/container.xlsx", geometry: dict | None = None):
+    # geometry: hasil load_ship_geometry yang sudah dimuat (mis. juga dipakai untuk ShipGeometry), agar workbook tidak dibaca ulang
+    # ===============================================================================================================================================
+    if geometry is None: geometry = load_ship_geometry(ship_path)
+    BAYS, TIERS, MAX_ROWS, VALID_SLOT_MASK_20FT, SLOT_PROPERTIES_20FT, VALID_PLACEMENTS_40FT, SLOT_PROPERTIES_40FT, tanks = unpack_ship_geometry(geometry)
+    manifest = load_manifest(container_path)
     TOTAL_VALID_SLOTS_20FT, TOTAL_VALID_SLOTS_40FT = len(SLOT_PROPERTIES_20FT), len(VALID_PLACEMENTS_40FT)
 
     # --- KONFIGURASI ALGORITMA ---
-    NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD = count_containers(containers)
-    NUM_PARTICLES, MAX_ITERATIONS = 50, 200
-    WEIGHT_PENALTY = {"vertical_moment": 0.0001, "longitudinal_balance": 100.0, "stability_tcg": 8000.0}
+    NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD = count_manifest_sizes(manifest)
+    NUM_PARTICLES, MAX_ITERATIONS = DEFAULT_NUM_PARTICLES, DEFAULT_MAX_ITERATIONS
+    WEIGHT_PENALTY = dict(DEFAULT_WEIGHT_PENALTY)
     
     return TOTAL_VALID_SLOTS_20FT, NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD, SLOT_PROPERTIES_20FT, VALID_SLOT_MASK_20FT, VALID_PLACEMENTS_40FT, SLOT_PROPERTIES_40FT, MAX_ITERATIONS, TIERS, NUM_PARTICLES, WEIGHT_PENALTY, BAYS, MAX_ROWS, tanks
 
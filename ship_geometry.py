@@ -0,0 +1,94 @@
+import numpy as np
+
+ON_DECK_FIRST_TIER = 82  # konvensi penomoran tier: < 82 di palka (Under Deck), >= 82 di atas deck
+
+def default_under_deck(tiers):
+    """Flag Under Deck per tier dari nomor tier, bila workbook tidak menyediakan kolom Inhold."""
+    return np.asarray(tiers, dtype=np.int64) < ON_DECK_FIRST_TIER
+
+class ShipGeometry:
+    """
+    Geometri kapal sebagai array kontigu. Slot diidentifikasi dengan indeks datar
+    np.ravel_multi_index((t_idx, b_idx, r_idx), shape), sama seperti tensor denah di stowage_engine.
+
+    - slot_ids_20ft / heads_40ft: indeks datar slot 20ft valid & kepala penempatan 40ft (urutan sumber);
+      lcg/vcg/tcg_20ft dan lcg/vcg/tcg_40ft sejajar dengan keduanya; ekor 40ft = kepala + tail_offset_40ft.
+    - cell_props_* (3, n_cells) & cell_mask_*: properti/validitas per sel untuk lookup langsung dengan indeks datar.
+    - under_deck: flag Under Deck per t_idx (None bila nomor tier tidak diketahui).
+    - stack_slots[stack_offsets[k]:stack_offsets[k+1]]: slot 20ft tumpukan k = b_idx * max_rows + r_idx,
+      terurut tier dari bawah ke atas (lihat stack(); dipakai pengendapan warm start di stowage_engine).
+    """
+    def __init__(self, valid_mask, slot_coords_20ft, slot_props_20ft, placements_40ft, slot_props_40ft,
+                 bays=None, tiers=None, under_deck=None):
+        self.valid_mask = np.array(valid_mask, dtype=bool)  # salinan: array dibuat read-only di bawah
+        self.shape = self.valid_mask.shape
+        self.max_rows, self.num_cells = self.shape[2], int(np.prod(self.shape))
+        self.bays = None if bays is None else np.array(bays, dtype=np.int64)
+        self.tiers = None if tiers is None else np.array(tiers, dtype=np.int64)
+        if under_deck is None and tiers is not None: under_deck = default_under_deck(tiers)
+        self.under_deck = None if under_deck is None else np.array(under_deck, dtype=bool)
+
+        # Indeks datar & vektor properti (lcg, vcg, tcg)
+        slot_props_20ft = np.array(slot_props_20ft, dtype=np.float64).reshape(-1, 3)
+        slot_props_40ft = np.array(slot_props_40ft, dtype=np.float64).reshape(-1, 3)
+        self.slot_ids_20ft = self.flat_index(*np.asarray(slot_coords_20ft, dtype=np.int64).reshape(-1, 3).T)
+        self.heads_40ft = self.flat_index(*np.asarray(placements_40ft, dtype=np.int64).reshape(-1, 3).T)
+        self.lcg_20ft, self.vcg_20ft, self.tcg_20ft = slot_props_20ft.T
+        self.lcg_40ft, self.vcg_40ft, self.tcg_40ft = slot_props_40ft.T
+        self.tail_offset_40ft = self.max_rows  # (t, b+1, r) relatif terhadap (t, b, r)
+
+        # Lookup per sel
+        self.cell_props_20ft, self.cell_props_40ft = np.zeros((3, self.num_cells)), np.zeros((3, self.num_cells))
+        self.cell_mask_20ft, self.cell_mask_40ft = np.zeros(self.num_cells, dtype=bool), np.zeros(self.num_cells, dtype=bool)
+        self.cell_props_20ft[:, self.slot_ids_20ft], self.cell_mask_20ft[self.slot_ids_20ft] = slot_props_20ft.T, True
+        self.cell_props_40ft[:, self.heads_40ft], self.cell_mask_40ft[self.heads_40ft] = slot_props_40ft.T, True
+
+        # Tumpukan per (bay, row), tier dari bawah ke atas (CSR)
+        t_idx, b_idx, r_idx = self.coords(self.slot_ids_20ft)
+        stack_of_slot = b_idx * self.max_rows + r_idx
+        order = np.lexsort((t_idx, stack_of_slot))
+        self.stack_slots = self.slot_ids_20ft[order]
+        self.stack_offsets = np.searchsorted(stack_of_slot[order], np.arange(self.shape[1] * self.max_rows + 1))
+
+        for arr in vars(self).values():
+            if isinstance(arr, np.ndarray): arr.flags.writeable = False  # dibagikan antar planner
+
+    # MARK: Konstruktor
+    @classmethod
+    def from_compiled(cls, geometry):
+        """Dari dict array ship_data.compile_ship_geometry / load_ship_geometry."""
+        return cls(geometry["valid_mask"], geometry["slot_coords_20ft"], geometry["slot_props_20ft"],
+                   geometry["placements_40ft"], geometry["slot_props_40ft"], bays=geometry["bays"], tiers=geometry["tiers"],
+                   under_deck=geometry.get("under_deck"))
+
+    @classmethod
+    def from_legacy(cls, valid_mask, slot_properties_20ft, valid_placements_40ft, slot_properties_40ft, bays=None, tiers=None):
+        """Dari struktur lama: dict {(t_idx, b_idx, r_idx): {'lcg', 'vcg', 'tcg'}} dan list penempatan 40ft."""
+        def props(props_by_coords, coords):
+            return [[props_by_coords[c]['lcg'], props_by_coords[c]['vcg'], props_by_coords[c]['tcg']] for c in coords]
+        coords_20ft, coords_40ft = list(slot_properties_20ft), [tuple(c) for c in valid_placements_40ft]
+        return cls(valid_mask, coords_20ft, props(slot_properties_20ft, coords_20ft), coords_40ft,
+                   props(slot_properties_40ft, coords_40ft), bays=bays, tiers=tiers)
+
+    def legacy(self):
+        """Struktur lama (BAYS, TIERS, MAX_ROWS, mask, SLOT_PROPERTIES_20FT, VALID_PLACEMENTS_40FT, SLOT_PROPERTIES_40FT)."""
+        def props_dict(slots, lcg, vcg, tcg):
+            coords = np.stack(self.coords(slots), axis=1).tolist()
+            return {tuple(c): {'lcg': l, 'vcg': v, 'tcg': t} for c, l, v, t in zip(coords, lcg.tolist(), vcg.tolist(), tcg.tolist())}
+        SLOT_PROPERTIES_40FT = props_dict(self.heads_40ft, self.lcg_40ft, self.vcg_40ft, self.tcg_40ft)
+        return (self.bays.tolist(), self.tiers.tolist(), self.max_rows, self.valid_mask,
+                props_dict(self.slot_ids_20ft, self.lcg_20ft, self.vcg_20ft, self.tcg_20ft),
+                list(SLOT_PROPERTIES_40FT), SLOT_PROPERTIES_40FT)
+
+    # MARK: Indeks
+    def flat_index(self, t_idx, b_idx, r_idx):
+        return np.ravel_multi_index((t_idx, b_idx, r_idx), self.shape)
+
+    def coords(self, flat):
+        """Indeks datar -> (t_idx, b_idx, r_idx)."""
+        return np.unravel_index(flat, self.shape)
+
+    def stack(self, b_idx, r_idx):
+        """Slot 20ft valid tumpukan (b_idx, r_idx) sebagai indeks datar, tier dari bawah ke atas."""
+        k = b_idx * self.max_rows + r_idx
+        return self.stack_slots[self.stack_offsets[k]:self.stack_offsets[k + 1]]
@@ -0,0 +1,614 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+
+import hashlib
+import importlib
+import numpy as np
+import random
+import time
+
+from pso_stats import NULL_STATS
+from ship_geometry import ShipGeometry, default_under_deck
+
+# Kode khusus pada tensor denah (selain indeks kontainer >= 0)
+EMPTY_SLOT = -1
+OCCUPIED_40FT = -2
+
+# Alasan berhentinya run() (engine.stop_reason)
+STOP_MAX_ITERATIONS, STOP_TIME_BUDGET, STOP_STAGNATION = "max_iterations", "time_budget", "stagnation"
+
+# Denah awal (lihat _initial_plan)
+INIT_VCG, INIT_BALANCED = "vcg", "balanced"
+
+# Engine yang bisa dipilih dari entry point (main.py, batch_planner.py, benchmark.py); modul diimpor saat dipakai
+ENGINES = {"pso": ("pso_class", "PSO_Stowage_Planner"), "ga": ("ga_class", "GA_Stowage_Planner")}
+
+def get_engine(name):
+    """Kelas engine untuk nama di ENGINES."""
+    if name not in ENGINES: raise ValueError(f"Engine tidak dikenal: {name} (pilihan: {', '.join(ENGINES)})")
+    module, class_name = ENGINES[name]
+    return getattr(importlib.import_module(module), class_name)
+
+class StowageEngine(ABC):
+    """
+    Dasar semua engine optimasi stowage: geometri kapal, data kontainer, encoding penugasan, repair, fitness,
+    polishing & ekspor. Subclass (PSO_Stowage_Planner, GA_Stowage_Planner) cukup mengimplementasikan run()
+    dengan signature run(MAX_ITERATIONS, TIERS, NUM_PARTICLES, WEIGHT_PENALTY, ...) -> (gbest_position, gbest_summary).
+    """
+    def __init__(self, NUM_20FT_TO_LOAD, NUM_40FT_TO_LOAD, 
+                    all_containers, lightship_data, tanks_data, 
+                    slot_properties_20ft, valid_mask_20ft, 
+                    valid_placements_40ft, slot_properties_40ft, target_lcg, consistency_check=False, seed=None,
+                    safe_slot_cache_size=256, initializer=INIT_BALANCED, exact_20ft=False, geometry=None):
+        
+        self.lightship_weight, self.lightship_lcg, self.lightship_vcg, self.lightship_tcg = lightship_data.values()
+        # geometry: ShipGeometry (lihat ship_data.ship_geometry); tanpa itu dibangun dari dict/list lama
+        if geometry is None:
+            geometry = ShipGeometry.from_legacy(valid_mask_20ft, slot_properties_20ft, valid_placements_40ft, slot_properties_40ft)
+        self.geometry, self.tanks_data, self.valid_mask = geometry, tanks_data, geometry.valid_mask
+        self.position_shape, self.target_lcg = geometry.shape, target_lcg
+        self.gbest_fitness, self.gbest_position, self.gbest_summary = float('inf'), None, {}
+        self.gbest_assignment = None  # vektor penugasan gbest; gbest_position (grid) dibangun di akhir run()
+        self.stop_reason, self.iterations_run = None, 0  # diisi run(): STOP_* dan jumlah iterasi yang dijalankan
+        self.convergence = None  # [(detik sejak awal run, fitness gbest), ...], diisi _update_gbest selama run()
+        self.consistency_check = consistency_check  # True: setiap momen inkremental dicocokkan dengan hitung ulang penuh
+        self._canonical_positions = True  # False setelah warm start: posisi tidak lagi sama dengan hasil _repair_plan
+        self.seed, self.rng = seed, random.Random(seed)
+        self.stats = NULL_STATS  # RunStats saat run(profile=True); lihat pso_stats.py
+        if initializer not in (INIT_VCG, INIT_BALANCED): raise ValueError(f"initializer tidak dikenal: {initializer}")
+        self.initializer = initializer
+        self.exact_20ft = exact_20ft  # True: isi 20ft diselesaikan eksak per evaluasi (lihat _solve_20ft)
+        self._init_safe_slot_cache(safe_slot_cache_size)
+
+        # Momen lightship + tangki konstan selama optimasi: [berat, momen_l, momen_v, momen_t]
+        self._fixed_moments = np.array([self.lightship_weight, self.lightship_weight*self.lightship_lcg,
+                                        self.lightship_weight*self.lightship_vcg, self.lightship_weight*self.lightship_tcg], dtype=np.float64)
+        for tank in self.tanks_data:
+            self._fixed_moments += [tank['weight'], tank['weight']*tank['lcg'], tank['weight']*tank['vcg'], tank['weight']*tank['tcg']]
+
+        print("🔍 Memisahkan kontainer berdasarkan ukuran...")
+        containers_20ft = sorted([c for c in all_containers if c['size'] == 20], key=lambda x: x['weight'], reverse=True)
+        containers_40ft = sorted([c for c in all_containers if c['size'] == 40], key=lambda x: x['weight'], reverse=True)
+        self.containers_to_load_20ft, self.containers_to_load_40ft = containers_20ft[:NUM_20FT_TO_LOAD], containers_40ft[:NUM_40FT_TO_LOAD]
+        self.container_dict = {c['id']: c for c in self.containers_to_load_20ft + self.containers_to_load_40ft}
+        print(f"   - {len(self.containers_to_load_20ft)} kontainer 20ft dan {len(self.containers_to_load_40ft)} kontainer 40ft akan dimuat.")
+
+        # Denah disimpan sebagai tensor int32 berisi indeks kontainer (lihat EMPTY_SLOT / OCCUPIED_40FT)
+        self.containers = self.containers_to_load_20ft + self.containers_to_load_40ft
+        self.container_ids = np.array([c['id'] for c in self.containers], dtype=object)
+        self.container_weights = np.array([c['weight'] for c in self.containers], dtype=np.float64)
+        self.container_sizes = np.array([c['size'] for c in self.containers], dtype=np.int16)
+        self._is_40ft = self.container_sizes == 40
+        self._ids_20ft, self._ids_40ft = np.flatnonzero(~self._is_40ft), np.flatnonzero(self._is_40ft)
+        self._set_pinned(None)
+        self._build_slot_arrays()
+
+    def _build_slot_arrays(self):
+        """Array padat (lcg, vcg, tcg) per sel dari self.geometry, plus urutan slot berdasarkan VCG untuk repair."""
+        geometry = self.geometry
+        self._props_20ft, self._props_40ft = geometry.cell_props_20ft, geometry.cell_props_40ft
+        self._mask_20ft, self._mask_40ft = geometry.cell_mask_20ft, geometry.cell_mask_40ft
+
+        # Urutan slot 20ft & penempatan 40ft berdasarkan VCG (stabil, sama seperti sorted() sebelumnya)
+        num_cells = geometry.num_cells
+        self._slots_20ft_by_vcg = geometry.slot_ids_20ft[np.argsort(geometry.vcg_20ft, kind='stable')]
+        self._slots_20ft_by_vcg_coords = np.unravel_index(self._slots_20ft_by_vcg, self.position_shape)
+        self._vcg_rank_20ft = np.full(num_cells, num_cells, dtype=np.int64)
+        self._vcg_rank_20ft[self._slots_20ft_by_vcg] = np.arange(len(self._slots_20ft_by_vcg))
+        self._placements_40ft_by_vcg = geometry.heads_40ft[np.argsort(geometry.vcg_40ft, kind='stable')]
+        self._tail_offset_40ft = geometry.tail_offset_40ft  # (t, b+1, r) relatif terhadap (t, b, r) pada indeks datar
+        # Flag Under Deck per t_idx; None (geometri dari dict lama) = dihitung dari TIERS saat repair
+        self._under_deck_tiers = None if geometry.under_deck is None else tuple(geometry.under_deck.tolist())
+
+    # Array read-only yang cukup untuk update, repair & fitness partikel (dibagikan ke worker lewat shared memory)
+    KERNEL_ARRAYS = ('valid_mask', 'container_weights', 'container_sizes', '_is_40ft', '_ids_20ft', '_ids_40ft',
+                     '_props_20ft', '_props_40ft', '_mask_20ft', '_mask_40ft', '_slots_20ft_by_vcg', '_vcg_rank_20ft',
+                     '_placements_40ft_by_vcg', '_fixed_moments', '_movable')
+    KERNEL_SCALARS = ('position_shape', 'target_lcg', '_tail_offset_40ft', 'consistency_check', 'safe_slot_cache_size',
+                      'initializer', 'exact_20ft', '_under_deck_tiers', '_canonical_positions')
+
+    def _kernel_state(self):
+        """(arrays, scalars) minimal untuk merekonstruksi kernel planner di proses lain."""
+        return {k: getattr(self, k) for k in self.KERNEL_ARRAYS}, {k: getattr(self, k) for k in self.KERNEL_SCALARS}
+
+    @classmethod
+    def _from_kernel_state(cls, arrays, scalars, seed=None):
+        """Engine ringan tanpa data kontainer/ekspor, hanya untuk update, repair & fitness (worker/pulau)."""
+        planner = cls.__new__(cls)
+        planner.__dict__.update(arrays); planner.__dict__.update(scalars)
+        planner._slots_20ft_by_vcg_coords = np.unravel_index(planner._slots_20ft_by_vcg, planner.position_shape)
+        planner.seed, planner.rng, planner.stats = seed, random.Random(seed), NULL_STATS
+        planner.gbest_fitness, planner.gbest_assignment, planner.gbest_summary, planner.convergence = float('inf'), None, {}, None
+        planner._init_safe_slot_cache(planner.safe_slot_cache_size)
+        return planner
+
+    # MARK: Base Plan
+    def _create_base_plan(self, TIERS):
+        """Membangun denah dasar yang dari awal sudah mematuhi semua aturan constraint, termasuk aturan On Deck."""
+        print("🏗️  Membuat denah dasar yang valid (dengan aturan On Deck)...")
+        base_position = np.full(self.position_shape, EMPTY_SLOT, dtype=np.int32)
+        base_flat = base_position.reshape(-1)
+
+        # 1. Tempatkan semua kontainer 40ft
+        num_40ft = min(len(self._ids_40ft), len(self._placements_40ft_by_vcg))
+        heads = self._placements_40ft_by_vcg[:num_40ft]
+        base_flat[heads] = self._ids_40ft[:num_40ft]
+        base_flat[heads + self._tail_offset_40ft] = OCCUPIED_40FT
+
+        # 2 & 3. Tentukan "plafon" Under Deck lalu cari slot 20ft yang aman (sudah terurut VCG)
+        safe_20ft_slots = self._safe_20ft_slots(base_position, TIERS)
+
+        # 4. Isi slot-slot aman tersebut dengan kontainer 20ft
+        num_20ft = min(len(self._ids_20ft), len(safe_20ft_slots))
+        base_flat[safe_20ft_slots[:num_20ft]] = self._ids_20ft[:num_20ft]
+
+        return self._repair_plan(base_position, TIERS)
+
+    # MARK: Balanced Plan
+    def _create_balanced_plan(self, TIERS, WEIGHT_PENALTY):
+        """
+        Denah awal dengan momen seimbang. Okupansi sama dengan _create_base_plan (plafon Under Deck & aturan 40ft
+        tetap terpenuhi), tetapi kontainer 40ft (berat menurun) diisi tier demi tier dari bawah ke kepala yang
+        paling mengoreksi momen melintang (TCG) dan momen memanjang terhadap target_lcg. Kontainer 20ft tidak
+        ikut diseimbangkan karena repair selalu mengurutkannya kembali berdasarkan berat & VCG.
+        """
+        assignment = self._encode_plan(self._create_base_plan(TIERS))
+        print("⚖️  Menyeimbangkan momen kontainer 40ft...")
+        ids_40ft = self._ids_40ft[assignment[self._ids_40ft] >= 0]
+        ids_40ft = ids_40ft[np.argsort(-self.container_weights[ids_40ft], kind='stable')]
+        heads = assignment[ids_40ft]
+        head_tiers = np.unravel_index(heads, self.position_shape)[0]
+        lcg, vcg, tcg = self._props_40ft[:, heads]
+        moments = self._fixed_moments + self._assignment_moments(assignment, self._ids_20ft)
+        remaining = self.container_weights[ids_40ft].sum()
+        total_weight = moments[0] + remaining
+        free = np.ones(len(heads), dtype=bool)
+        free_lcg, free_tcg = lcg.sum(), tcg.sum()
+        for n_free, cid in zip(range(len(heads), 0, -1), ids_40ft):
+            w = self.container_weights[cid]
+            remaining -= w
+            candidates = np.flatnonzero(free & (head_tiers == head_tiers[free].min()))
+            # Momen akhir diperkirakan (sisa kontainer tersebar merata di kepala kosong), dinilai dengan penalti fitness
+            spread = remaining / max(n_free - 1, 1)
+            final_l = moments[1] + w * lcg[candidates] + spread * (free_lcg - lcg[candidates])
+            final_t = moments[3] + w * tcg[candidates] + spread * (free_tcg - tcg[candidates])
+            cost = WEIGHT_PENALTY["longitudinal_balance"] * np.abs(final_l / total_weight - self.target_lcg) \
+                   + WEIGHT_PENALTY["stability_tcg"] * np.maximum(np.abs(final_t / total_weight) - 0.2, 0.0) \
+                   + WEIGHT_PENALTY["vertical_moment"] * w * vcg[candidates]
+            j = candidates[np.argmin(cost)]
+            free[j], assignment[cid] = False, heads[j]
+            free_lcg, free_tcg = free_lcg - lcg[j], free_tcg - tcg[j]
+            moments += w * np.array([1.0, lcg[j], vcg[j], tcg[j]])
+        return self._repair_plan(self._decode_assignment(assignment), TIERS)
+
+    def _initial_plan(self, TIERS, WEIGHT_PENALTY):
+        """Denah awal swarm sesuai self.initializer (INIT_VCG: _create_base_plan, INIT_BALANCED: _create_balanced_plan)."""
+        if self.initializer == INIT_BALANCED: return self._create_balanced_plan(TIERS, WEIGHT_PENALTY)
+        return self._create_base_plan(TIERS)
+
+    # MARK: Warm Start
+    def _warm_start_plan(self, placements, TIERS):
+        """
+        Denah awal dari rencana sebelumnya; placements = {container_id: (t_idx, b_idx, r_idx)} (lihat warm_start.py).
+        Kontainer 40ft yang masih ada & slotnya masih valid tetap di tempat, 40ft baru mengisi penempatan kosong
+        dengan VCG terendah, kontainer yang sudah dibatalkan tidak muncul lagi. Kontainer 20ft lama tetap di slot
+        lamanya selama slot itu masih aman untuk okupansi 40ft yang baru; 20ft baru (atau yang slot lamanya tidak
+        aman lagi) mengisi slot aman kosong, terberat ke VCG terendah. Hanya tumpukan yang tersentuh perubahan
+        yang diendapkan ulang (_settle_stacks); tidak ada pengurutan ulang berat global seperti _repair_plan.
+        Placements tidak menyimpan berat, jadi kontainer yang ditimbang ulang tetap di slot lamanya.
+        """
+        plan = np.full(self.position_shape, EMPTY_SLOT, dtype=np.int32)
+        flat, tail = plan.reshape(-1), self._tail_offset_40ft
+
+        def previous_cell(cid):
+            coords = placements.get(cid)
+            if coords is None or any(not 0 <= c < n for c, n in zip(coords, self.position_shape)): return None
+            return int(np.ravel_multi_index(tuple(coords), self.position_shape))
+
+        kept, added = set(), []
+        for idx in self._ids_40ft:
+            head = previous_cell(self.container_ids[idx])
+            if head is not None and self._mask_40ft[head] and flat[head] == EMPTY_SLOT and flat[head + tail] == EMPTY_SLOT:
+                flat[head], flat[head + tail] = idx, OCCUPIED_40FT; kept.add(idx)
+            else:
+                added.append(idx)
+        free_heads = (h for h in self._placements_40ft_by_vcg if flat[h] == EMPTY_SLOT and flat[h + tail] == EMPTY_SLOT)
+        for idx, head in zip(added, free_heads):
+            flat[head], flat[head + tail] = idx, OCCUPIED_40FT
+
+        # Slot aman ditentukan oleh okupansi 40ft saja (denah saat ini belum berisi 20ft)
+        safe_slots = self._safe_20ft_slots(plan, TIERS)
+        is_safe = np.zeros(flat.size, dtype=bool); is_safe[safe_slots] = True
+        added_20ft = []
+        for idx in self._ids_20ft:
+            cell = previous_cell(self.container_ids[idx])
+            if cell is not None and is_safe[cell] and flat[cell] == EMPTY_SLOT:
+                flat[cell] = idx; kept.add(idx)
+            else:
+                added.append(idx); added_20ft.append(idx)
+        added_20ft = self._sort_20ft_ids(np.array(added_20ft, dtype=np.int64))
+        free_cells = safe_slots[flat[safe_slots] == EMPTY_SLOT][:len(added_20ft)]
+        flat[free_cells] = added_20ft[:len(free_cells)]
+
+        # Tumpukan tersentuh: slot lama kontainer yang tidak tetap (batal/dipindah) & slot yang baru diisi
+        vacated = [cell for cid, coords in placements.items()
+                   if (cell := previous_cell(cid)) is not None and flat[cell] < 0]
+        vacated += [cell + tail for cell in vacated if cell + tail < flat.size]
+        touched = np.unravel_index(np.concatenate((np.array(vacated, dtype=np.int64), free_cells)), self.position_shape)[1:]
+        self._settle_stacks(plan, is_safe, set(zip(*(c.tolist() for c in touched))))
+
+        known = set(self.container_ids.tolist())
+        print(f"♻️  Warm start: {len(kept)} kontainer tetap di slot lama, {len(added)} baru/dipindah, "
+              f"{sum(cid not in known for cid in placements)} dari rencana lama tidak dimuat lagi.")
+        return plan
+
+    def _settle_stacks(self, plan, is_safe, stacks):
+        """
+        Endapkan 20ft (in-place) pada tumpukan (b_idx, r_idx) di `stacks`: isi 20ft tiap tumpukan dipadatkan ke
+        slot aman terbawahnya dengan urutan vertikal tetap, sehingga tidak ada slot aman kosong di bawah 20ft.
+        """
+        flat = plan.reshape(-1)
+        for b_idx, r_idx in stacks:
+            cells = self.geometry.stack(b_idx, r_idx)
+            cells = cells[is_safe[cells]]
+            ids = flat[cells]
+            ids = ids[ids >= 0]
+            flat[cells] = EMPTY_SLOT
+            flat[cells[:len(ids)]] = ids
+
+    def _unchanged_slots(self, assignment, placements):
+        """Slot kontainer yang posisinya sama dengan placements (rencana lama), -1 untuk kontainer baru/dipindah."""
+        previous = np.full(len(assignment), EMPTY_SLOT, dtype=np.int32)
+        for idx, cid in enumerate(self.container_ids.tolist()):
+            coords = placements.get(cid)
+            if coords is not None and all(0 <= c < n for c, n in zip(coords, self.position_shape)):
+                previous[idx] = np.ravel_multi_index(tuple(coords), self.position_shape)
+        return np.where((assignment >= 0) & (assignment == previous), assignment, EMPTY_SLOT).astype(np.int32)
+
+    def _set_pinned(self, pinned_slots):
+        """
+        Kunci kontainer di slotnya (pinned_slots[i] >= 0) selama run: swap, polish & _solve_20ft hanya memindahkan
+        kontainer dengan _movable True. None = tidak ada yang dikunci.
+        """
+        self._pinned_slots = np.full(len(self._is_40ft), EMPTY_SLOT, dtype=np.int32) if pinned_slots is None else pinned_slots
+        self._movable = self._pinned_slots < 0
+
+    def _check_pinned(self):
+        """Kontainer yang dikunci (warm start: tidak berubah) harus tetap di slotnya pada gbest."""
+        pinned = np.flatnonzero(self._pinned_slots >= 0)
+        if self.gbest_assignment is not None and (self.gbest_assignment[pinned] != self._pinned_slots[pinned]).any():
+            raise RuntimeError("Kontainer yang tidak berubah berpindah slot pada hasil warm start.")
+
+    # MARK: Safe Slot Cache
+    def _init_safe_slot_cache(self, size):
+        """Cache LRU daftar slot 20ft aman per tata letak 40ft; size <= 0 mematikan cache."""
+        self.safe_slot_cache_size, self._safe_slot_cache = size, OrderedDict()
+        self.safe_slot_cache_hits = self.safe_slot_cache_misses = 0
+
+    def _stack_ceilings(self, occupied):
+        """Tier tertinggi yang terisi per (bay, row); -1 bila tumpukan kosong."""
+        top_from_above = np.argmax(occupied[::-1], axis=0)
+        return np.where(occupied.any(axis=0), self.position_shape[0] - 1 - top_from_above, -1)
+
+    def _safe_20ft_slots(self, plan, TIERS):
+        """
+        Indeks datar slot 20ft yang kosong & aman (aturan On Deck/Under Deck), terurut VCG.
+        `plan` hanya berisi kontainer 40ft, jadi hasilnya cukup ditentukan oleh okupansi 40ft dan
+        di-memo dengan kunci hash okupansi tersebut. Array hasil bersifat read-only.
+        """
+        occupied = plan != EMPTY_SLOT
+        if self.safe_slot_cache_size <= 0:
+            return self._compute_safe_20ft_slots(occupied, TIERS)
+        digest = hashlib.blake2b(np.packbits(occupied).tobytes(), digest_size=16)
+        digest.update(np.asarray(TIERS, dtype=np.int64).tobytes())
+        key = digest.digest()
+        safe_slots = self._safe_slot_cache.get(key)
+        if safe_slots is not None:
+            self.safe_slot_cache_hits += 1
+            self._safe_slot_cache.move_to_end(key)
+            return safe_slots
+        self.safe_slot_cache_misses += 1
+        safe_slots = self._compute_safe_20ft_slots(occupied, TIERS)
+        safe_slots.flags.writeable = False
+        self._safe_slot_cache[key] = safe_slots
+        if len(self._safe_slot_cache) > self.safe_slot_cache_size:
+            self._safe_slot_cache.popitem(last=False)
+        return safe_slots
+
+    def _compute_safe_20ft_slots(self, occupied, TIERS):
+        ceilings = self._stack_ceilings(occupied)
+        t_idx, b_idx, r_idx = self._slots_20ft_by_vcg_coords
+        ceiling = ceilings[b_idx, r_idx]
+        under_deck = (np.asarray(self._under_deck_tiers) if self._under_deck_tiers is not None else default_under_deck(TIERS))[t_idx]
+        is_empty = ~occupied.reshape(-1)[self._slots_20ft_by_vcg]
+        # Under Deck: harus di bawah plafon; On Deck: aturan plafon tidak berlaku
+        is_safe = is_empty & (~under_deck | (ceiling == -1) | (t_idx < ceiling))
+        return self._slots_20ft_by_vcg[is_safe]
+
+    def _container_cells(self, plan, size):
+        """Indeks datar sel yang berisi kontainer berukuran `size` (urutan np.ravel)."""
+        flat = plan.reshape(-1)
+        cells = np.flatnonzero(flat >= 0)
+        return cells[self.container_sizes[flat[cells]] == size]
+
+    # MARK: Particle Encoding
+    # Partikel disimpan sebagai vektor penugasan: assignment[i] = indeks datar slot kontainer i
+    # (slot kepala untuk 40ft), -1 jika tidak termuat. Grid 3D hanya dibangun saat dibutuhkan.
+    def _encode_plan(self, plan):
+        """Grid denah -> vektor penugasan (int32)."""
+        flat = plan.reshape(-1)
+        cells = np.flatnonzero(flat >= 0)
+        assignment = np.full(len(self.container_weights), EMPTY_SLOT, dtype=np.int32)
+        assignment[flat[cells]] = cells
+        return assignment
+
+    def _decode_assignment(self, assignment):
+        """Vektor penugasan -> grid denah (untuk print_bestplan / export_plan_to_excel)."""
+        plan = np.full(self.position_shape, EMPTY_SLOT, dtype=np.int32)
+        flat = plan.reshape(-1)
+        placed = np.flatnonzero(assignment >= 0)
+        flat[assignment[placed]] = placed
+        placed_40ft = placed[self._is_40ft[placed]]
+        flat[assignment[placed_40ft] + self._tail_offset_40ft] = OCCUPIED_40FT
+        return plan
+
+    def _update_gbest(self, position, fitness, summary):
+        """Salin posisi terbaik ke buffer gbest (in-place setelah alokasi pertama)."""
+        if self.gbest_assignment is None: self.gbest_assignment = position.copy()
+        else: np.copyto(self.gbest_assignment, position)
+        self.gbest_fitness, self.gbest_summary = fitness, summary
+        if self.convergence is not None: self.convergence.append((time.perf_counter() - self._run_started, fitness))
+
+    # MARK: Convergence
+    def _start_convergence(self):
+        """Mulai merekam riwayat gbest (detik sejak awal run, fitness) untuk time_to_target."""
+        self._run_started, self.convergence = time.perf_counter(), []
+
+    def time_to_target(self, target_fitness):
+        """Detik sejak awal run() hingga gbest pertama kali <= target_fitness; None bila tidak tercapai."""
+        return next((elapsed for elapsed, fitness in self.convergence or () if fitness <= target_fitness), None)
+
+    # MARK: Repair Plan
+    # --- FUNGSI PERBAIKAN DENGAN ATURAN ON DECK BARU ---
+    def _repair_plan(self, plan, TIERS):
+        repaired_plan = np.full(self.position_shape, EMPTY_SLOT, dtype=np.int32)
+        repaired_flat = repaired_plan.reshape(-1)
+
+        # 1. Kunci semua posisi 40ft
+        heads = self._container_cells(plan, 40)
+        repaired_flat[heads] = plan.reshape(-1)[heads]
+        repaired_flat[heads + self._tail_offset_40ft] = OCCUPIED_40FT
+
+        # 2. Kumpulkan & urutkan SEMUA kontainer 20ft (berat menurun; berat sama -> indeks kontainer, agar repair idempoten)
+        sorted_20ft_ids = self._sort_20ft_ids(plan.reshape(-1)[self._container_cells(plan, 20)])
+
+        # 3. Tentukan "plafon" & cari SEMUA slot yang aman untuk 20ft dengan aturan On Deck/Under Deck
+        safe_20ft_slots = self._safe_20ft_slots(repaired_plan, TIERS)
+
+        # 4. Isi kembali slot aman dengan kontainer 20ft terurut
+        num_20ft = min(len(sorted_20ft_ids), len(safe_20ft_slots))
+        repaired_flat[safe_20ft_slots[:num_20ft]] = sorted_20ft_ids[:num_20ft]
+
+        return repaired_plan
+
+    def _repair_assignment(self, assignment, TIERS):
+        """Repair penuh untuk vektor penugasan (lewat grid sementara)."""
+        return self._encode_plan(self._repair_plan(self._decode_assignment(assignment), TIERS))
+
+    def _sort_20ft_ids(self, ids_20ft):
+        """Urutan isi ulang 20ft: berat menurun, lalu indeks kontainer."""
+        return ids_20ft[np.lexsort((ids_20ft, -self.container_weights[ids_20ft]))]
+
+    # MARK: Exact 20ft
+    def _solve_20ft(self, assignment, moments, WEIGHT_PENALTY, TIERS, strengths=(0.0, 0.125, 0.25, 0.5, 1.0)):
+        """
+        Penempatan 20ft eksak (in-place) untuk tata letak 40ft tetap, menggantikan pengisian greedy _repair_plan.
+        Kandidat adalah SEMUA slot aman _safe_20ft_slots untuk okupansi 40ft tersebut (dikurangi slot kontainer
+        yang dikunci, lihat _set_pinned), jadi solver memilih slot yang dipakai sekaligus urutannya. Biaya kontainer
+        i di slot j adalah w_i * c_j dengan c_j = penalti VCG + gradien penalti LCG/TCG (linearisasi); matriks biaya
+        rank-1 dengan w_i >= 0, jadi assignment optimalnya: k slot dengan c_j terkecil, terberat ke c_j terkecil,
+        tanpa Hungarian. Linearisasi dicoba dengan beberapa kekuatan (strengths, 0 = hanya VCG = repair biasa) dan
+        dipilih yang fitness sebenarnya terbaik. Hasil hanya bergantung pada posisi 40ft & kontainer terkunci.
+        Return assignment.
+        """
+        ids = self._sort_20ft_ids(self._ids_20ft[(assignment[self._ids_20ft] >= 0) & self._movable[self._ids_20ft]])
+        if len(ids) == 0: return assignment
+        layout_40ft = np.full(self.position_shape, EMPTY_SLOT, dtype=np.int32)
+        heads = assignment[self._ids_40ft]; heads = heads[heads >= 0]
+        layout_40ft.reshape(-1)[np.concatenate((heads, heads + self._tail_offset_40ft))] = OCCUPIED_40FT
+        slots = self._safe_20ft_slots(layout_40ft, TIERS)
+        pinned = self._ids_20ft[(assignment[self._ids_20ft] >= 0) & ~self._movable[self._ids_20ft]]
+        if len(pinned): slots = slots[~np.isin(slots, assignment[pinned])]
+        k = min(len(ids), len(slots))
+        weights, props = self.container_weights[ids[:k]], self._props_20ft[:, slots]
+        rest = moments - self._assignment_moments(assignment, ids)  # momen kargo tanpa 20ft yang dipindah solver
+        tie_break, vertical = self._vcg_rank_20ft[slots], WEIGHT_PENALTY["vertical_moment"] * props[1]
+
+        def place(cost):
+            order = np.lexsort((tie_break, cost))[:k]
+            placed = np.concatenate(([weights.sum()], props[:, order] @ weights))
+            return order, placed
+
+        order, placed = place(vertical)
+        totals = self._fixed_moments + rest + placed
+        ship_lcg, ship_tcg = totals[1] / totals[0], totals[3] / totals[0]
+        grad_l = WEIGHT_PENALTY["longitudinal_balance"] * np.sign(ship_lcg - self.target_lcg) / totals[0]
+        grad_t = WEIGHT_PENALTY["stability_tcg"] * np.sign(ship_tcg) / totals[0] if abs(ship_tcg) > 0.2 else 0.0
+        best = (self._fitness_from_moments(rest + placed, WEIGHT_PENALTY)[0], order, placed)
+        for strength in strengths:
+            if strength == 0.0: continue
+            order, placed = place(vertical + strength * (grad_l * props[0] + grad_t * props[2]))
+            fitness = self._fitness_from_moments(rest + placed, WEIGHT_PENALTY)[0]
+            if fitness < best[0]: best = (fitness, order, placed)
+        _, order, placed = best
+        assignment[ids[:k]], assignment[ids[k:]] = slots[order], EMPTY_SLOT  # tidak muat: sama seperti _repair_plan
+        moments[:] = rest + placed
+        return assignment
+
+    # MARK: Fitness
+    def _moments_of(self, ids, slots):
+        """[berat, momen_l, momen_v, momen_t] untuk kontainer `ids` yang menempati `slots` (indeks datar)."""
+        is_40ft = self._is_40ft[ids]
+        props = np.where(is_40ft, self._props_40ft[:, slots], self._props_20ft[:, slots])
+        weights = np.where(is_40ft, self._mask_40ft[slots], self._mask_20ft[slots]) * self.container_weights[ids]
+        return np.concatenate(([weights.sum()], props @ weights))
+
+    def _cargo_moments(self, plan, cells=None):
+        """Momen kargo pada `cells` (indeks datar) sebuah grid denah, atau seluruh denah jika None."""
+        flat = plan.reshape(-1)
+        cells = np.flatnonzero(flat >= 0) if cells is None else cells[flat[cells] >= 0]
+        return self._moments_of(flat[cells], cells)
+
+    def _assignment_moments(self, assignment, ids=None):
+        """Momen kargo kontainer `ids` pada vektor penugasan, atau semua kontainer jika None."""
+        ids = np.flatnonzero(assignment >= 0) if ids is None else ids[assignment[ids] >= 0]
+        return self._moments_of(ids, assignment[ids])
+
+    def _swap_moment_delta(self, id1, id2, c1, c2):
+        """Perubahan momen bila kontainer id1 (di c1) & id2 (di c2), ukuran sama, bertukar slot: (w2 - w1) * (props[c1] - props[c2])."""
+        props, mask = (self._props_40ft, self._mask_40ft) if self._is_40ft[id1] else (self._props_20ft, self._mask_20ft)
+        weight_diff = self.container_weights[id2] - self.container_weights[id1]
+        delta = np.empty(4)
+        delta[0] = weight_diff * (float(mask[c1]) - float(mask[c2]))
+        delta[1:] = weight_diff * (props[:, c1] - props[:, c2])
+        return delta
+
+    def _check_moments(self, assignment, moments):
+        """Mode konsistensi: bandingkan momen inkremental dengan perhitungan ulang penuh."""
+        expected = self._assignment_moments(assignment)
+        if not np.allclose(moments, expected, rtol=1e-9, atol=1e-6):
+            raise RuntimeError(f"Momen inkremental tidak konsisten: {moments} != {expected}")
+
+    def _check_repair(self, repaired, expected):
+        """Mode konsistensi: repair inkremental harus identik dengan repair penuh."""
+        if not np.array_equal(repaired, expected):
+            raise RuntimeError(f"Repair inkremental berbeda dari repair penuh pada {np.count_nonzero(repaired != expected)} posisi.")
+
+    def _calculate_fitness(self, plan, WEIGHT_PENALTY):
+        return self._fitness_from_moments(self._cargo_moments(plan), WEIGHT_PENALTY)
+
+    def _fitness_from_moments(self, cargo_moments, WEIGHT_PENALTY):
+        total_weight, total_moment_l, total_moment_v, total_moment_t = map(float, self._fixed_moments + cargo_moments)
+        if total_weight == 0: return float('inf'), {}
+        final_ship_lcg, final_ship_vcg, final_ship_tcg = total_moment_l/total_weight, total_moment_v/total_weight, total_moment_t/total_weight
+        penalties = defaultdict(float)
+        penalties["vertical_moment"], penalties["longitudinal_balance"] = total_moment_v, abs(final_ship_lcg - self.target_lcg)
+        if abs(final_ship_tcg) > 0.2: penalties["stability_tcg"] = abs(final_ship_tcg) - 0.2
+        total_fitness = sum(WEIGHT_PENALTY[key] * val for key, val in penalties.items())
+        summary = {"fitness": total_fitness, "ship_lcg": final_ship_lcg, "ship_vcg": final_ship_vcg, "ship_tcg": final_ship_tcg, "total_weight": total_weight}
+        return total_fitness, summary
+
+    # MARK: Batch Fitness
+    def _batch_moments(self, assignments):
+        """Momen kargo (partikel, 4) untuk matriks penugasan (partikel, kontainer) dalam satu operasi gather + dot."""
+        placed = assignments >= 0
+        slots = np.where(placed, assignments, 0)
+        is_40ft = self._is_40ft[None, :]
+        weights = np.where(is_40ft, self._mask_40ft[slots], self._mask_20ft[slots]) * placed * self.container_weights
+        moments = np.empty((len(assignments), 4))
+        moments[:, 0] = weights.sum(axis=1)
+        for k in range(3):
+            props = np.where(is_40ft, self._props_40ft[k][slots], self._props_20ft[k][slots])
+            moments[:, k + 1] = np.einsum('pn,pn->p', props, weights)
+        return moments
+
+    def _fitness_from_moments_batch(self, cargo_moments, WEIGHT_PENALTY):
+        """Versi vektor dari _fitness_from_moments; penalti WEIGHT_PENALTY diterapkan elemen-per-elemen."""
+        totals = self._fixed_moments + cargo_moments
+        total_weight = totals[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ship_lcg, ship_vcg, ship_tcg = (totals[:, 1:] / total_weight[:, None]).T
+        fitness = WEIGHT_PENALTY["vertical_moment"] * totals[:, 2] + WEIGHT_PENALTY["longitudinal_balance"] * np.abs(ship_lcg - self.target_lcg)
+        excess_tcg = np.abs(ship_tcg) - 0.2
+        fitness = fitness + np.where(excess_tcg > 0, WEIGHT_PENALTY["stability_tcg"] * excess_tcg, 0.0)
+        fitness[total_weight == 0] = float('inf')
+        summaries = [{"fitness": float(fitness[k]), "ship_lcg": float(ship_lcg[k]), "ship_vcg": float(ship_vcg[k]),
+                      "ship_tcg": float(ship_tcg[k]), "total_weight": float(total_weight[k])} if total_weight[k] != 0 else {}
+                     for k in range(len(fitness))]
+        return fitness, summaries
+
+    def _calculate_fitness_batch(self, assignments, WEIGHT_PENALTY):
+        """Fitness & ringkasan semua partikel sekaligus dari matriks penugasan (partikel, kontainer)."""
+        return self._fitness_from_moments_batch(self._batch_moments(np.atleast_2d(assignments)), WEIGHT_PENALTY)
+
+    # MARK: Polishing
+    def polish(self, WEIGHT_PENALTY, time_budget=None, max_swaps=None, block_cells=1 << 20, TIERS=None):
+        """
+        Local search steepest-descent pada gbest setelah run(). Setiap langkah menilai semua swap 40ft-40ft
+        sekaligus dari delta momen (w2 - w1) * (props[c1] - props[c2]) lalu menerapkan swap terbaik; okupansi
+        tidak berubah sehingga tidak perlu repair. Swap 20ft tidak dicoba karena repair selalu mengembalikan
+        urutan 20ft. Berhenti bila tidak ada swap yang memperbaiki fitness, time_budget (detik) habis, atau
+        max_swaps tercapai. Pasangan dievaluasi per blok (block_cells elemen) agar memori tetap kecil.
+        TIERS dibutuhkan untuk _solve_20ft bila exact_20ft.
+        Return (gbest_position, gbest_summary).
+        """
+        if self.gbest_assignment is None: raise ValueError("polish() membutuhkan gbest; jalankan run() terlebih dahulu.")
+        if self.exact_20ft and TIERS is None: raise ValueError("polish() dengan exact_20ft membutuhkan TIERS.")
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        assignment = self.gbest_assignment.copy()
+        ids = self._ids_40ft[(assignment[self._ids_40ft] >= 0) & self._movable[self._ids_40ft]]
+        weights = self.container_weights[ids]
+        totals = self._fixed_moments + self._assignment_moments(assignment)
+        start_fitness = current = self._fitness_from_moments(totals - self._fixed_moments, WEIGHT_PENALTY)[0]
+        rows = max(1, block_cells // max(len(ids), 1))
+        swaps, reason = 0, "local_optimum"
+        while True:
+            if max_swaps is not None and swaps >= max_swaps: reason = "max_swaps"; break
+            if deadline is not None and time.perf_counter() >= deadline: reason = STOP_TIME_BUDGET; break
+            props = self._props_40ft[:, assignment[ids]]
+            best_fitness, best_pair = current, None
+            for start in range(0, len(ids), rows):
+                block = slice(start, start + rows)
+                weight_diff = weights[None, :] - weights[block, None]
+                ship_lcg, ship_vcg_moment, ship_tcg = ((totals[k + 1] + weight_diff * (props[k, block, None] - props[k, None, :])) for k in range(3))
+                fitness = WEIGHT_PENALTY["vertical_moment"] * ship_vcg_moment \
+                          + WEIGHT_PENALTY["longitudinal_balance"] * np.abs(ship_lcg / totals[0] - self.target_lcg) \
+                          + WEIGHT_PENALTY["stability_tcg"] * np.maximum(np.abs(ship_tcg / totals[0]) - 0.2, 0.0)
+                k = int(np.argmin(fitness))
+                if fitness.flat[k] < best_fitness:
+                    best_fitness, best_pair = float(fitness.flat[k]), (start + k // len(ids), k % len(ids))
+            if best_pair is None or best_fitness > current - 1e-9 * abs(current): break
+            id1, id2 = ids[best_pair[0]], ids[best_pair[1]]
+            totals += self._swap_moment_delta(id1, id2, assignment[id1], assignment[id2])
+            assignment[id1], assignment[id2] = assignment[id2], assignment[id1]
+            current, swaps = best_fitness, swaps + 1
+
+        if self.exact_20ft: self._solve_20ft(assignment, totals - self._fixed_moments, WEIGHT_PENALTY, TIERS)
+        fitness, summary = self._fitness_from_moments(self._assignment_moments(assignment), WEIGHT_PENALTY)
+        if fitness < self.gbest_fitness: self._update_gbest(assignment, fitness, summary)
+        print(f"✨ Polishing ({reason}): {swaps} swap, fitness {start_fitness:.2f} -> {self.gbest_fitness:.2f}")
+        self.polish_swaps, self.polish_stop_reason = swaps, reason
+        self.gbest_position = self._decode_assignment(self.gbest_assignment)
+        return self.gbest_position, self.gbest_summary
+
+    # MARK: Main
+    @abstractmethod
+    def run(self, MAX_ITERATIONS, TIERS, NUM_PARTICLES, WEIGHT_PENALTY, **kwargs):
+        """Jalankan optimasi; return (gbest_position, gbest_summary)."""
+
+    # MARK: Export
+    def export_plan(self, plan, TIERS, BAYS, MAX_ROWS, filename="stowage_plan.xlsx", export_dir="export", fmt=None, background=False):
+        """Ekspor denah dalam format xlsx / csv / parquet, opsional di thread latar belakang (lihat plan_export.py)."""
+        from plan_export import export_plan
+        return export_plan(self, plan, TIERS, BAYS, MAX_ROWS, filename, export_dir, fmt=fmt, background=background)
+
+    def export_plan_to_excel(self, plan, TIERS, BAYS, MAX_ROWS, filename="stowage_plan.xlsx", export_dir="export"):
+        return self.export_plan(plan, TIERS, BAYS, MAX_ROWS, filename, export_dir, fmt="xlsx")
+
+def generate_order(n: int) -> list[int]:
+    if n <= 0:
+        return []
+    if n % 2 == 1:  # ganjil
+        evens_desc = list(range(n - 1, -1, -2))   # ... 8,6,4,2,0
+        odds_asc   = list(range(1, n - 1, 2))     # ... 1,3,5,7
+    else:           # genap
+        evens_desc = list(range(n, 1, -2))        # ... 8,6,4,2
+        odds_asc   = list(range(1, n, 2))         # ... 1,3,5,7
+    return evens_desc + odds_asc
+
+def value_by_indexed_order(n: int, x: int):
+    order = generate_order(n)
+    if 0 <= x < len(order):
+        v = order[x]
+        return f"{v:02d}"  # selalu 2 digit
+    return None
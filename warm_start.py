@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from pathlib import Path
+
+from baplie import placements_from_baplie
+from format_containerexcel import extract_size_from_iso
+from npz_cache import load_npz, save_npz_atomic
+from pso_class import generate_order
+
+PLAN_NPZ_VERSION = 1
+BAPLIE_SUFFIXES = (".edi", ".baplie")
+
+# Rencana sebelumnya untuk warm start direpresentasikan sebagai placements:
+# {container_id: (t_idx, b_idx, r_idx)}; untuk 40ft koordinatnya adalah slot kepala (bay ganjil pertama).
+
+# MARK: Placements dari Excel
+def placements_from_excel(file_path, BAYS, TIERS, MAX_ROWS):
+    """Baca hasil export_plan_to_excel (mis. export/hasilstowageplan.xlsx) kembali menjadi placements."""
+    df = pd.read_excel(file_path, sheet_name=0, dtype=str)
+    missing = [c for c in ("Container ID", "Bay", "Row", "Tier", "Container ISO") if c not in df.columns]
+    if missing:
+        raise ValueError(f"Kolom {missing} tidak ditemukan di {file_path}")
+
+    bay_index, tier_index = {b: i for i, b in enumerate(BAYS)}, {t: i for i, t in enumerate(TIERS)}
+    row_index = {label: i for i, label in enumerate(generate_order(int(MAX_ROWS)))}  # kebalikan value_by_indexed_order
+    placements, skipped = {}, 0
+    for cid, bay, row, tier, iso in df[["Container ID", "Bay", "Row", "Tier", "Container ISO"]].itertuples(index=False):
+        try:
+            bay = int(bay) - 1 if extract_size_from_iso(iso) == 40 else int(bay)  # 40ft diekspor dengan bay genap
+            placements[str(cid).strip()] = (tier_index[int(tier)], bay_index[bay], row_index[int(row)])
+        except (KeyError, TypeError, ValueError):
+            skipped += 1
+    if skipped:
+        print(f"⚠️ {skipped} baris di {file_path} tidak dapat dipetakan ke slot kapal dan diabaikan.")
+    return placements
+
+# MARK: Placements dari Array
+def placements_from_plan(plan, container_ids):
+    """Grid denah (indeks kontainer, lihat pso_class) + container_ids planner yang membuatnya -> placements."""
+    coords = np.argwhere(np.asarray(plan) >= 0)
+    return {container_ids[plan[tuple(c)]]: tuple(int(v) for v in c) for c in coords}
+
+def save_plan(file_path, plan, container_ids):
+    """Simpan denah sebagai .npz (id kontainer + koordinat), tidak bergantung pada urutan kontainer planner."""
+    placements = placements_from_plan(plan, container_ids)
+    save_npz_atomic(file_path, {
+        "version": np.array(PLAN_NPZ_VERSION),
+        "ids": np.array(list(placements.keys()), dtype=str),
+        "coords": np.array(list(placements.values()), dtype=np.int64).reshape(-1, 3),
+    })
+
+def placements_from_npz(file_path):
+    if not Path(file_path).exists():
+        raise FileNotFoundError(f"File tidak ditemukan: {file_path}")
+    arrays = load_npz(file_path, PLAN_NPZ_VERSION)
+    if arrays is None:
+        raise ValueError(f"File rencana tidak valid: {file_path}")
+    return {cid: tuple(c) for cid, c in zip(arrays["ids"].tolist(), arrays["coords"].tolist())}
+
+def load_placements(file_path, BAYS, TIERS, MAX_ROWS):
+    """Placements dari rencana sebelumnya: .xlsx (export_plan_to_excel), .npz (save_plan) atau BAPLIE (.edi/.baplie)."""
+    suffix = Path(file_path).suffix.lower()
+    if suffix == ".npz":
+        return placements_from_npz(file_path)
+    if suffix in BAPLIE_SUFFIXES:
+        return placements_from_baplie(file_path, BAYS, TIERS, MAX_ROWS)
+    return placements_from_excel(file_path, BAYS, TIERS, MAX_ROWS)